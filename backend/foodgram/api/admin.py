@@ -1,6 +1,6 @@
 from django.contrib import admin
-from recipes.models import Tag, Ingredient, Favorite, ShoppingCart
-from users.models import Follow
+from recipes.models import Tag, Ingredient, Favorite, Recipe, ShoppingCart
+from users.models import Follow, Profile
 
 
 class TagAdmin(admin.ModelAdmin):
@@ -25,17 +25,19 @@ class IngredientAdmin(admin.ModelAdmin):
 
 class RecipesAdmin(admin.ModelAdmin):
     list_display = ('name', 'author', 'favorite',)
+    list_select_related = ('author',)
     list_filter = ('name', 'author__username', 'tags',)
     search_fields = ('name', 'author__username', 'tags__name')
 
+    @admin.display(ordering='favorites_count')
     def favorite(self, obj):
-        if Favorite.objects.filter(recipe=obj).exists():
-            return Favorite.objects.filter(recipe=obj).count()
-        return 0
+        return obj.favorites_count
 
 
 admin.site.register(Tag, TagAdmin)
 admin.site.register(Ingredient, IngredientAdmin)
+admin.site.register(Recipe, RecipesAdmin)
 admin.site.register(Favorite)
 admin.site.register(Follow)
+admin.site.register(Profile)
 admin.site.register(ShoppingCart)
@@ -0,0 +1,24 @@
+from statistics import median
+from time import perf_counter
+
+
+def percentile(values, share):
+    return sorted(values)[max(int(len(values) * share) - 1, 0)]
+
+
+def time_calls(run, arguments):
+    timings = []
+    for argument in arguments:
+        started = perf_counter()
+        run(argument)
+        timings.append((perf_counter() - started) * 1000)
+    return timings
+
+
+def report(label, timings):
+    return (
+        f'{label}: {len(timings)} queries, '
+        f'p50 {median(timings):.3f} ms, '
+        f'p95 {percentile(timings, 0.95):.3f} ms, '
+        f'max {max(timings):.3f} ms'
+    )
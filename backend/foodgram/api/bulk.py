@@ -0,0 +1,211 @@
+from django.db import connection, transaction
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .relations import invalidate_relation
+from .serializers import BulkIdsSerializer
+
+CREATED = 'created'
+EXISTS = 'exists'
+INVALID = 'invalid'
+NOT_FOUND = 'not_found'
+DELETED = 'deleted'
+ABSENT = 'absent'
+
+
+def placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+def execute_returning(sql, params, column, ids):
+    # Returns the ids the statement actually wrote. SQLite keeps other
+    # writers from committing while the transaction holds its read lock,
+    # so there the ids checked earlier in the same transaction are exact.
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'{sql} RETURNING {quote(column)}', params)
+            return [id for id, in cursor.fetchall()]
+        cursor.execute(sql, params)
+        return list(ids) if cursor.rowcount else []
+
+
+def insert_relations(model, field, user_id, ids):
+    # INSERT ... SELECT from the target table skips ids that do not exist,
+    # and the conflict clause skips rows that do.
+    quote = connection.ops.quote_name
+    target = model._meta.get_field(field)
+    row = model(user_id=user_id)
+    columns, values, params = [], [], []
+    for column in model._meta.concrete_fields:
+        if column.primary_key:
+            continue
+        columns.append(quote(column.column))
+        if column is target:
+            values.append(f'target.{quote(target.target_field.column)}')
+        else:
+            values.append('%s')
+            params.append(column.get_db_prep_save(
+                column.pre_save(row, add=True), connection
+            ))
+    if connection.vendor == 'sqlite':
+        insert, on_conflict = 'INSERT OR IGNORE', ''
+    else:
+        insert, on_conflict = 'INSERT', ' ON CONFLICT DO NOTHING'
+    sql = (
+        f'{insert} INTO {quote(model._meta.db_table)} '
+        f'({", ".join(columns)}) '
+        f'SELECT {", ".join(values)} '
+        f'FROM {quote(target.related_model._meta.db_table)} AS target '
+        f'WHERE target.{quote(target.target_field.column)} '
+        f'IN ({placeholders(ids)}){on_conflict}'
+    )
+    return execute_returning(sql, params + list(ids), target.column, ids)
+
+
+def delete_relations(model, field, user_id, ids):
+    # A plain DELETE: QuerySet.delete() would select the rows first to send
+    # post_delete, and the views apply those side effects themselves.
+    quote = connection.ops.quote_name
+    column = model._meta.get_field(field).column
+    sql = (
+        f'DELETE FROM {quote(model._meta.db_table)} '
+        f'WHERE {quote(model._meta.get_field("user").column)} = %s '
+        f'AND {quote(column)} IN ({placeholders(ids)})'
+    )
+    return execute_returning(sql, [user_id, *ids], column, ids)
+
+
+class BulkRelationView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    model = None
+    target_model = None
+    field = None
+    relation = None
+    exists_message = None
+    invalid_message = None
+
+    def post(self, request, id=None):
+        if id is None:
+            return self.bulk_response(self.add(request, self.get_ids()))
+        result = self.add_one(request, id)
+        if result == CREATED:
+            return Response(
+                {'user': request.user.id, self.field: id},
+                status=status.HTTP_201_CREATED
+            )
+        if result == NOT_FOUND:
+            errors = {self.field: [
+                f'Invalid pk "{id}" - object does not exist.'
+            ]}
+        elif result == EXISTS:
+            errors = {'status': self.exists_message}
+        else:
+            errors = {'non_field_errors': [self.invalid_message]}
+        return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def delete(self, request, id=None):
+        if id is None:
+            return self.bulk_response(self.remove(request, self.get_ids()))
+        if self.remove_one(request, id) == NOT_FOUND:
+            return Response(
+                {'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def get_ids(self):
+        serializer = BulkIdsSerializer(data=self.request.data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data['ids']))
+
+    def bulk_response(self, results):
+        return Response({'results': results})
+
+    def get_invalid_ids(self, request):
+        return set()
+
+    def relations(self, request, ids):
+        return self.model.objects.filter(
+            user=request.user, **{f'{self.field}_id__in': ids}
+        )
+
+    def existing(self, request, ids):
+        found = set(self.target_model.objects.filter(
+            pk__in=ids
+        ).values_list('pk', flat=True))
+        related = set(self.relations(request, found).values_list(
+            f'{self.field}_id', flat=True
+        ))
+        return found, related
+
+    def changed(self, request, ids, added):
+        pass
+
+    def insert_rows(self, request, ids):
+        return insert_relations(self.model, self.field, request.user.id, ids)
+
+    def inserted(self, request, ids):
+        self.changed(request, ids, added=True)
+        invalidate_relation(request.user.id, self.relation)
+
+    def remove_rows(self, request, ids):
+        deleted = delete_relations(
+            self.model, self.field, request.user.id, ids
+        )
+        if deleted:
+            self.changed(request, deleted, added=False)
+            invalidate_relation(request.user.id, self.relation)
+        return deleted
+
+    @transaction.atomic
+    def add_one(self, request, id):
+        if id in self.get_invalid_ids(request):
+            return INVALID
+        inserted = self.insert_rows(request, [id])
+        if inserted:
+            self.inserted(request, inserted)
+            return CREATED
+        if not self.target_model.objects.filter(pk=id).exists():
+            return NOT_FOUND
+        return EXISTS
+
+    @transaction.atomic
+    def remove_one(self, request, id):
+        if self.remove_rows(request, [id]):
+            return DELETED
+        if not self.target_model.objects.filter(pk=id).exists():
+            return NOT_FOUND
+        return ABSENT
+
+    @transaction.atomic
+    def add(self, request, ids):
+        found, related = self.existing(request, ids)
+        invalid = self.get_invalid_ids(request)
+        statuses = {}
+        for id in ids:
+            if id not in found:
+                statuses[id] = NOT_FOUND
+            elif id in invalid:
+                statuses[id] = INVALID
+            elif id in related:
+                statuses[id] = EXISTS
+            else:
+                statuses[id] = CREATED
+        created = [id for id in ids if statuses[id] == CREATED]
+        inserted = created and self.insert_rows(request, created)
+        if inserted:
+            self.inserted(request, inserted)
+        return [{'id': id, 'status': statuses[id]} for id in ids]
+
+    @transaction.atomic
+    def remove(self, request, ids):
+        found, related = self.existing(request, ids)
+        if related:
+            self.remove_rows(request, related)
+        return [
+            {'id': id,
+             'status': (NOT_FOUND if id not in found
+                        else DELETED if id in related else ABSENT)}
+            for id in ids
+        ]
@@ -0,0 +1,118 @@
+from hashlib import md5
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework.renderers import JSONRenderer
+
+from foodgram.metrics import CACHE_REQUESTS
+from foodgram.transactions import on_commit_batch
+
+
+def version_key(namespace):
+    return f'{namespace}:version'
+
+
+def get_version(namespace):
+    version = cache.get(version_key(namespace))
+    if version is None:
+        cache.add(version_key(namespace), uuid4().hex, None)
+        version = cache.get(version_key(namespace))
+    return version
+
+
+def get_versions(namespaces):
+    keys = {version_key(namespace): namespace for namespace in namespaces}
+    cached = cache.get_many(keys)
+    return {
+        namespace: cached[key] if key in cached else get_version(namespace)
+        for key, namespace in keys.items()
+    }
+
+
+def response_key(namespace, version, request):
+    # Query strings are unbounded, memcached keys are limited to 250 chars.
+    path = md5(request.get_full_path().encode()).hexdigest()
+    return f'{namespace}:{version}:{path}'
+
+
+def invalidate(namespace):
+    cache.set(version_key(namespace), uuid4().hex, None)
+
+
+def invalidate_many(namespaces):
+    cache.set_many(
+        {version_key(namespace): uuid4().hex for namespace in namespaces},
+        None
+    )
+
+
+def invalidate_on_commit(namespace):
+    on_commit_batch(invalidate_many, namespace)
+
+
+class CachedResponseMixin:
+    cache_namespace = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def get_cached_response(self, view, request, *args, **kwargs):
+        renderer = JSONRenderer()
+        if request.accepted_renderer.format != renderer.format:
+            return view(request, *args, **kwargs)
+        key = response_key(
+            self.cache_namespace, get_version(self.cache_namespace), request
+        )
+        content = cache.get(key)
+        CACHE_REQUESTS.labels(
+            self.cache_namespace, 'miss' if content is None else 'hit'
+        ).inc()
+        if content is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = renderer.render(response.data)
+            cache.set(key, content, settings.API_CACHE_TIMEOUT)
+        return HttpResponse(content, content_type=renderer.media_type)
+
+
+def conditional_response(request, etag, last_modified, get_response):
+    etag = quote_etag(etag)
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is None:
+        response = get_response()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def merge_user_flags(data, relations):
+    for recipe in data['results']:
+        recipe['is_favorited'] = recipe['id'] in relations['favorites']
+        recipe['is_in_shopping_cart'] = (
+            recipe['id'] in relations['shopping_cart']
+        )
+        recipe['author']['is_subscribed'] = (
+            recipe['author']['id'] in relations['following']
+        )
+    return data
@@ -0,0 +1,135 @@
+import json
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+
+from api.benchmarks import percentile
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    help = ('Measures latency and query counts of the API endpoints and '
+            'writes them to a JSON file')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--output', default='benchmark.json')
+        parser.add_argument(
+            '--compare', help='Previous results file to print deltas against'
+        )
+
+    def get_endpoints(self):
+        recipe = Recipe.objects.first()
+        follow = Follow.objects.select_related('user').first()
+        tag = Tag.objects.first()
+        ingredient = Ingredient.objects.first()
+        if not (recipe and follow and tag and ingredient):
+            raise CommandError('Run seed_benchmark first.')
+        user = follow.user
+        deep_page = max(min(Recipe.objects.count() // 6, 50), 1)
+        cart_recipe = ShoppingCart.objects.filter(user=user).first()
+        favorite = Favorite.objects.filter(user=user).first()
+        return user, [
+            ('tags-list', 'get', '/api/tags/'),
+            ('tags-detail', 'get', f'/api/tags/{tag.id}/'),
+            ('ingredients-list', 'get', '/api/ingredients/'),
+            ('ingredients-search', 'get',
+             f'/api/ingredients/?name={ingredient.name[:2]}'),
+            ('ingredients-detail', 'get',
+             f'/api/ingredients/{ingredient.id}/'),
+            ('recipes-list', 'get', '/api/recipes/'),
+            ('recipes-list-deep', 'get', f'/api/recipes/?page={deep_page}'),
+            ('recipes-list-cursor', 'get', '/api/recipes/?cursor='),
+            ('recipes-feed', 'get', '/api/recipes/feed/'),
+            ('recipes-list-tags', 'get', f'/api/recipes/?tags={tag.slug}'),
+            ('recipes-list-author', 'get',
+             f'/api/recipes/?author={recipe.author_id}'),
+            ('recipes-list-favorited', 'get', '/api/recipes/?is_favorited=1'),
+            ('recipes-list-in-cart', 'get',
+             '/api/recipes/?is_in_shopping_cart=1'),
+            ('recipes-detail', 'get', f'/api/recipes/{recipe.id}/'),
+            ('users-list', 'get', '/api/users/'),
+            ('users-detail', 'get', f'/api/users/{follow.author_id}/'),
+            ('users-me', 'get', '/api/users/me/'),
+            ('subscriptions', 'get', '/api/users/subscriptions/'),
+            ('download-shopping-cart', 'get',
+             '/api/recipes/download_shopping_cart/'),
+            ('favorite-toggle', 'post',
+             f'/api/recipes/{favorite.recipe_id}/favorite/'
+             if favorite else None),
+            ('shopping-cart-toggle', 'post',
+             f'/api/recipes/{cart_recipe.recipe_id}/shopping_cart/'
+             if cart_recipe else None),
+            ('subscribe-toggle', 'post',
+             f'/api/users/{follow.author_id}/subscribe/'),
+        ]
+
+    def call(self, client, method, path):
+        with CaptureQueriesContext(connection) as queries:
+            started = perf_counter()
+            response = getattr(client, method)(path)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            elapsed = (perf_counter() - started) * 1000
+        if response.status_code >= 400:
+            raise CommandError(
+                f'{method.upper()} {path} returned {response.status_code}'
+            )
+        return elapsed, len(queries)
+
+    def measure(self, client, method, path, repeat):
+        timings, queries = [], []
+        for _ in range(repeat):
+            if method == 'post':
+                # Toggle endpoints start from an existing relation, so the
+                # relation is removed first and restored by the POST.
+                client.delete(path)
+            elapsed, count = self.call(client, method, path)
+            timings.append(elapsed)
+            queries.append(count)
+        return {
+            'path': path,
+            'method': method.upper(),
+            'p50_ms': round(median(timings), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'queries': max(queries),
+        }
+
+    def handle(self, *args, **options):
+        user, endpoints = self.get_endpoints()
+        token, _ = Token.objects.get_or_create(user=user)
+        client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+        results = {}
+        for name, method, path in endpoints:
+            if path is None:
+                continue
+            self.call(client, 'get' if method == 'get' else 'options', path)
+            results[name] = self.measure(
+                client, method, path, options['repeat']
+            )
+        with open(options['output'], 'w') as file:
+            json.dump(results, file, indent=2)
+        previous = {}
+        if options['compare']:
+            with open(options['compare']) as file:
+                previous = json.load(file)
+        for name, result in results.items():
+            line = (f'{name:<24} p50 {result["p50_ms"]:>8.2f} ms  '
+                    f'p95 {result["p95_ms"]:>8.2f} ms  '
+                    f'queries {result["queries"]:>3}')
+            if name in previous:
+                before = previous[name]
+                line += (
+                    f'  (p50 {result["p50_ms"] - before["p50_ms"]:+.2f} ms, '
+                    f'queries {result["queries"] - before["queries"]:+d})'
+                )
+            self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(
+            f'Results written to {options["output"]}'
+        ))
@@ -0,0 +1,48 @@
+import random
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Q
+
+from api.benchmarks import report, time_calls
+from api.matching import match_index, match_recipes
+from recipes.models import Ingredient, Recipe
+
+
+class Command(BaseCommand):
+    help = ('Compares "cook with what I have" ranking through ORM joins '
+            'and through the in-memory inverted index')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--ingredients', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        ingredient_ids = list(Ingredient.objects.values_list('pk', flat=True))
+        if len(ingredient_ids) < options['ingredients']:
+            raise CommandError('Run seed_benchmark first.')
+        queries = [
+            rng.sample(ingredient_ids, options['ingredients'])
+            for _ in range(options['queries'])
+        ]
+        started = perf_counter()
+        with match_index.lock:
+            match_index.sync()
+        self.stdout.write(
+            f'index load: {(perf_counter() - started) * 1000:.1f} ms'
+        )
+        runs = {
+            'orm': lambda ids: list(Recipe.objects.annotate(
+                covered=Count('recipe', filter=Q(recipe__ingredient__in=ids)),
+                total=Count('recipe'),
+            ).filter(covered__gt=0).annotate(
+                missing=F('total') - F('covered')
+            ).order_by('-covered', 'missing', '-id').values_list(
+                'id', 'covered', 'missing'
+            )),
+            'index': match_recipes,
+        }
+        for label, run in runs.items():
+            self.stdout.write(report(label, time_calls(run, queries)))
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.benchmarks import report, time_calls
+from api.search import search_ingredients
+from recipes.models import Ingredient
+
+
+class Command(BaseCommand):
+    help = ('Compares ingredient autocomplete latency of the legacy '
+            'istartswith filter and the search backend')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--prefix-length', type=int, default=3)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        names = Ingredient.objects.values_list('name', flat=True)
+        queries = sorted({
+            name[:length].lower()
+            for name in names
+            for length in range(1, options['prefix_length'] + 1)
+        })
+        if not queries:
+            raise CommandError('Load ingredients before benchmarking.')
+        limit = settings.INGREDIENT_SEARCH_LIMIT
+        # Both sides return at most `limit` rows, like the endpoint does.
+        runs = {
+            'before': lambda query: list(
+                Ingredient.objects.filter(name__istartswith=query)[:limit]
+            ),
+            'after': lambda query: search_ingredients(query, limit),
+        }
+        search_ingredients(queries[0], limit)
+        for label, run in runs.items():
+            self.stdout.write(report(
+                label, time_calls(run, queries * options['repeat'])
+            ))
@@ -0,0 +1,48 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+
+from api.benchmarks import report, time_calls
+from recipes.models import Ingredient, Recipe
+from recipes.search import search_recipes
+
+
+class Command(BaseCommand):
+    help = ('Compares recipe search latency of icontains lookups and the '
+            'full-text index; seed with seed_benchmark --recipes 100000')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--queries', type=int, default=50)
+        parser.add_argument('--page-size', type=int, default=6)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def get_queries(self, count, rng):
+        names = list(Ingredient.objects.values_list('name', flat=True)[:1000])
+        titles = list(Recipe.objects.values_list('name', flat=True)[:1000])
+        if not names or not titles:
+            raise CommandError('Run seed_benchmark first.')
+        return [
+            rng.choice(names if index % 2 else titles)
+            for index in range(count)
+        ]
+
+    def handle(self, *args, **options):
+        queries = self.get_queries(
+            options['queries'], random.Random(options['seed'])
+        )
+        size = options['page_size']
+        runs = {
+            'icontains': lambda query: list(Recipe.objects.filter(
+                Q(name__icontains=query)
+                | Q(text__icontains=query)
+                | Q(ingredients__name__icontains=query)
+            ).distinct().order_by('-date', '-id')[:size]),
+            'full-text': lambda query: list(
+                search_recipes(Recipe.objects.all(), query)[:size]
+            ),
+        }
+        self.stdout.write(f'{Recipe.objects.count()} recipes')
+        for label, run in runs.items():
+            run(queries[0])
+            self.stdout.write(report(label, time_calls(run, queries)))
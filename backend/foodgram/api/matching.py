@@ -0,0 +1,108 @@
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import IngredientRecipe
+
+from .cache import get_version
+
+NAMESPACE = 'ingredient_index'
+POSITION_KEY = f'{NAMESPACE}:position'
+
+
+def change_key(position):
+    return f'{NAMESPACE}:change:{position}'
+
+
+def record_changes(recipe_ids):
+    cache.add(POSITION_KEY, 0, None)
+    position = cache.incr(POSITION_KEY, len(recipe_ids))
+    cache.set_many(
+        {change_key(position - offset): recipe_id
+         for offset, recipe_id in enumerate(recipe_ids)},
+        settings.API_CACHE_TIMEOUT
+    )
+
+
+class IngredientMatchIndex:
+    def __init__(self):
+        self.version = None
+        self.position = 0
+        self.postings = {}
+        self.ingredients = {}
+        self.lock = Lock()
+
+    def load(self, version, position):
+        postings, ingredients = {}, {}
+        rows = IngredientRecipe.objects.order_by(
+            'ingredient_id', 'recipe_id'
+        ).values_list('ingredient_id', 'recipe_id')
+        for ingredient_id, recipe_id in rows.iterator():
+            postings.setdefault(ingredient_id, array('q')).append(recipe_id)
+            ingredients.setdefault(recipe_id, []).append(ingredient_id)
+        self.postings, self.ingredients = postings, ingredients
+        self.version, self.position = version, position
+
+    def apply(self, recipe_ids):
+        current = {}
+        for recipe_id, ingredient_id in IngredientRecipe.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id'):
+            current.setdefault(recipe_id, []).append(ingredient_id)
+        for recipe_id in recipe_ids:
+            for ingredient_id in self.ingredients.pop(recipe_id, ()):
+                recipes = self.postings[ingredient_id]
+                del recipes[bisect_left(recipes, recipe_id)]
+            for ingredient_id in current.get(recipe_id, ()):
+                insort(
+                    self.postings.setdefault(ingredient_id, array('q')),
+                    recipe_id
+                )
+            if recipe_id in current:
+                self.ingredients[recipe_id] = current[recipe_id]
+
+    def sync(self):
+        version = get_version(NAMESPACE)
+        position = cache.get(POSITION_KEY, 0)
+        pending = position - self.position
+        if (version != self.version or pending < 0
+                or pending > settings.INGREDIENT_INDEX_MAX_CHANGES):
+            return self.load(version, position)
+        if not pending:
+            return
+        keys = [change_key(index)
+                for index in range(self.position + 1, position + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) < len(keys):
+            return self.load(version, position)
+        self.apply(set(changes.values()))
+        self.position = position
+
+    def match(self, ingredient_ids):
+        with self.lock:
+            self.sync()
+            covered = Counter()
+            for ingredient_id in set(ingredient_ids):
+                covered.update(self.postings.get(ingredient_id, ()))
+            totals = {
+                recipe_id: len(self.ingredients[recipe_id])
+                for recipe_id in covered
+            }
+        return sorted(
+            (
+                (recipe_id, count, totals[recipe_id] - count)
+                for recipe_id, count in covered.items()
+            ),
+            key=lambda match: (-match[1], match[2], -match[0]),
+        )
+
+
+match_index = IngredientMatchIndex()
+
+
+def match_recipes(ingredient_ids):
+    return match_index.match(ingredient_ids)
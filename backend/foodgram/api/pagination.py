@@ -1,5 +1,108 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if connections[queryset.db].vendor != 'postgresql':
+            return super().count
+        plan = json.loads(queryset.explain(format='json'))
+        estimate = plan[0]['Plan']['Plan Rows']
+        if estimate < settings.PAGINATION_ESTIMATE_THRESHOLD:
+            return super().count
+        return estimate
 
 
 class RecipePagination(PageNumberPagination):
     page_size = 6
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get(self.count_query_param) == 'estimate':
+            self.django_paginator_class = EstimatedCountPaginator
+        return super().paginate_queryset(queryset, request, view)
+
+
+class RecipeFeedPagination(RecipePagination):
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('-date', '-id')
+
+    def is_cursor_mode(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.is_cursor_mode(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+        self.request = request
+        position = self.decode_cursor(
+            request.query_params.get(self.cursor_query_param)
+        )
+        queryset = queryset.order_by(*self.cursor_ordering)
+        if position is not None:
+            date, id = position
+            queryset = queryset.filter(
+                Q(date__lt=date) | Q(date=date, id__lt=id)
+            )
+        page_size = self.get_page_size(request)
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_cursor_link()),
+            ('results', data),
+        ]))
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        url = remove_query_param(
+            self.request.build_absolute_uri(), self.page_query_param
+        )
+        return replace_query_param(
+            url, self.cursor_query_param,
+            self.encode_cursor(last.date, last.id)
+        )
+
+    def encode_cursor(self, date, id):
+        return urlsafe_b64encode(
+            f'{date.isoformat()}|{id}'.encode()
+        ).decode()
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None
+        try:
+            date, id = urlsafe_b64decode(
+                cursor.encode()
+            ).decode().split('|')
+            return datetime.fromisoformat(date), int(id)
+        except (TypeError, ValueError):
+            raise NotFound('Invalid cursor')
+
+
+class FollowingFeedPagination(RecipeFeedPagination):
+
+    def is_cursor_mode(self, request):
+        return True
@@ -0,0 +1,69 @@
+from array import array
+
+from django.conf import settings
+from django.core.cache import cache
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Follow
+
+from .cache import get_versions, invalidate_on_commit
+
+RELATIONS = {
+    'favorites': (Favorite, 'recipe_id'),
+    'shopping_cart': (ShoppingCart, 'recipe_id'),
+    'following': (Follow, 'author_id'),
+}
+RELATION_NAMES = {model: name for name, (model, _) in RELATIONS.items()}
+
+
+def relation_namespace(user_id, name):
+    return f'relations:{user_id}:{name}'
+
+
+def pack(ids):
+    return array('q', sorted(ids)).tobytes()
+
+
+def unpack(data):
+    ids = array('q')
+    ids.frombytes(data)
+    return set(ids)
+
+
+def load_relations(user):
+    # The versions are read before the rows, so a set loaded just before a
+    # write commits is stored under a version that is already outdated.
+    namespaces = {
+        relation_namespace(user.id, name): name for name in RELATIONS
+    }
+    keys = {
+        f'{namespace}:{version}': namespaces[namespace]
+        for namespace, version in get_versions(namespaces).items()
+    }
+    cached = cache.get_many(keys)
+    relations, missing = {}, {}
+    for key, name in keys.items():
+        if key in cached:
+            relations[name] = unpack(cached[key])
+            continue
+        model, field = RELATIONS[name]
+        relations[name] = set(
+            model.objects.filter(user=user).values_list(field, flat=True)
+        )
+        missing[key] = pack(relations[name])
+    if missing:
+        cache.set_many(missing, settings.API_CACHE_TIMEOUT)
+    return relations
+
+
+def get_user_relations(request):
+    if not hasattr(request, '_user_relations'):
+        if request.user.is_anonymous:
+            request._user_relations = {name: set() for name in RELATIONS}
+        else:
+            request._user_relations = load_relations(request.user)
+    return request._user_relations
+
+
+def invalidate_relation(user_id, name):
+    invalidate_on_commit(relation_namespace(user_id, name))
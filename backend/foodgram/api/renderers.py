@@ -0,0 +1,107 @@
+import csv
+from io import BytesIO
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+CHUNK_SIZE = 100
+
+
+class Echo:
+
+    def write(self, value):
+        return value
+
+
+def chunked(lines, size=CHUNK_SIZE):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == size:
+            yield ''.join(chunk)
+            chunk = []
+    if chunk:
+        yield ''.join(chunk)
+
+
+class ShoppingCartRenderer(BaseRenderer):
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only error payloads reach render(), the cart itself is streamed.
+        return JSONRenderer().render(data)
+
+
+class ShoppingCartTextRenderer(ShoppingCartRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def stream(self, ingredients):
+        return chunked(
+            f'{name} ({measurement_unit}) – {amount}\n'
+            for name, measurement_unit, amount in ingredients
+        )
+
+
+class ShoppingCartCSVRenderer(ShoppingCartRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    header = ('name', 'measurement_unit', 'amount')
+
+    def stream(self, ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(self.header)
+        yield from chunked(writer.writerow(row) for row in ingredients)
+
+
+class ShoppingCartPDFRenderer(ShoppingCartRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_size = 12
+    margin = 50
+
+    def get_font(self):
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+
+        try:
+            pdfmetrics.registerFont(
+                TTFont('ShoppingCart', settings.SHOPPING_CART_PDF_FONT)
+            )
+        except OSError:
+            return 'Helvetica'
+        return 'ShoppingCart'
+
+    def stream(self, ingredients):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+
+        # PDF needs a cross-reference table at the end of the file, so the
+        # document is built first and then sent in chunks.
+        buffer = BytesIO()
+        document = canvas.Canvas(buffer, pagesize=A4)
+        font = self.get_font()
+        width, height = A4
+        line_height = self.font_size * 1.5
+        y = height - self.margin
+        document.setFont(font, self.font_size)
+        for name, measurement_unit, amount in ingredients:
+            if y < self.margin:
+                document.showPage()
+                document.setFont(font, self.font_size)
+                y = height - self.margin
+            document.drawString(
+                self.margin, y, f'{name} ({measurement_unit}) – {amount}'
+            )
+            y -= line_height
+        document.save()
+        buffer.seek(0)
+        yield from iter(lambda: buffer.read(8192), b'')
+
+
+SHOPPING_CART_RENDERERS = [
+    ShoppingCartTextRenderer,
+    ShoppingCartCSVRenderer,
+    ShoppingCartPDFRenderer,
+]
@@ -0,0 +1,79 @@
+from bisect import bisect_left
+from threading import Lock
+
+from django.db import connection
+from django.db.models.functions import Lower
+
+from recipes.models import Ingredient
+
+from .cache import get_version
+
+
+class DatabaseIngredientSearch:
+    def search(self, query, limit):
+        # LOWER(name) LIKE 'query%' is served by the text_pattern_ops index
+        # from migration 0003, substring matches only fill up the remainder.
+        ingredients = Ingredient.objects.annotate(lower_name=Lower('name'))
+        prefix = ingredients.filter(
+            lower_name__startswith=query
+        ).order_by('lower_name')
+        found = list(prefix[:limit])
+        if len(found) < limit:
+            found += ingredients.filter(
+                lower_name__contains=query
+            ).exclude(
+                lower_name__startswith=query
+            ).order_by('lower_name')[:limit - len(found)]
+        return found
+
+
+class SortedIngredientIndex:
+    def __init__(self):
+        self.version = None
+        self.names = []
+        self.rows = []
+        self.lock = Lock()
+
+    def load(self, version):
+        rows = sorted(
+            (name.lower(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'pk', 'name', 'measurement_unit'
+            )
+        )
+        self.names = [row[0] for row in rows]
+        self.rows = [
+            Ingredient(id=pk, name=name, measurement_unit=measurement_unit)
+            for _, pk, name, measurement_unit in rows
+        ]
+        self.version = version
+
+    def search(self, query, limit):
+        version = get_version('ingredients')
+        with self.lock:
+            if self.version != version:
+                self.load(version)
+            names, rows = self.names, self.rows
+        found = []
+        position = bisect_left(names, query)
+        while (position < len(names) and len(found) < limit
+               and names[position].startswith(query)):
+            found.append(rows[position])
+            position += 1
+        for name, row in zip(names, rows):
+            if len(found) == limit:
+                break
+            if query in name and not name.startswith(query):
+                found.append(row)
+        return found
+
+
+database_search = DatabaseIngredientSearch()
+sorted_index = SortedIngredientIndex()
+
+
+def search_ingredients(query, limit):
+    query = query.lower()
+    if connection.vendor == 'postgresql':
+        return database_search.search(query, limit)
+    return sorted_index.search(query, limit)
@@ -1,16 +1,20 @@
 from rest_framework import serializers
 from djoser.serializers import UserSerializer, UserCreateSerializer
 
-from recipes.models import (Tag, Recipe, Ingredient,
-                            IngredientRecipe, Favorite,
-                            ShoppingCart)
+from recipes.models import Tag, Recipe, Ingredient, IngredientRecipe
 
-from users.models import User, Follow
-from django.shortcuts import get_object_or_404
-from foodgram.settings import EXC_NAME
+from users.models import User
+from django.db import transaction
+from foodgram.settings import (BULK_RELATIONS_MAX_IDS, EXC_NAME,
+                               IMAGE_MAX_UPLOAD_SIZE,
+                               INGREDIENT_MATCH_MAX_INGREDIENTS,
+                               MINIMUM_AMOUNT_OF_INGREDIENT)
+from recipes.images import (ImageTooLarge, decode_base64,
+                            schedule_image_processing)
+from .relations import get_user_relations
 
-import base64
-from django.core.files.base import ContentFile
+import binascii
+from collections import Counter
 
 
 class Base64ImageField(serializers.ImageField):
@@ -18,11 +22,29 @@ class Base64ImageField(serializers.ImageField):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            try:
+                data = decode_base64(imgstr, ext)
+            except ImageTooLarge:
+                raise serializers.ValidationError(
+                    f'image must not exceed {IMAGE_MAX_UPLOAD_SIZE} bytes')
+            except binascii.Error:
+                raise serializers.ValidationError('invalid base64 image')
+        elif getattr(data, 'size', 0) > IMAGE_MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                f'image must not exceed {IMAGE_MAX_UPLOAD_SIZE} bytes')
 
         return super().to_internal_value(data)
 
 
+class ThumbnailField(serializers.ImageField):
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        return instance.image_thumbnail or instance.image
+
+
 class UserSerializerGet(UserSerializer):
 
     is_subscribed = serializers.SerializerMethodField()
@@ -37,10 +59,10 @@ class UserSerializerGet(UserSerializer):
             return data
 
     def get_is_subscribed(self, obj):
-        user = self.context['request'].user
-        return user.is_authenticated and Follow.objects.filter(
-            user=user, author=obj
-        ).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        relations = get_user_relations(self.context['request'])
+        return obj.id in relations['following']
 
 
 class RegistrationSerializer(UserCreateSerializer):
@@ -64,45 +86,6 @@ class RegistrationSerializer(UserCreateSerializer):
         return data
 
 
-class FollowSerializer(serializers.ModelSerializer):
-
-    class Meta:
-        model = Follow
-        fields = ('user', 'author')
-
-    def validate(self, data):
-        if data['user'] == data['author']:
-            raise serializers.ValidationError(
-                {'you cant subscribe on yourselph'})
-        return data
-
-
-class SubscriptionsSerializer(serializers.ModelSerializer):
-
-    id = serializers.ReadOnlyField(source='author.id')
-    email = serializers.ReadOnlyField(source='author.email')
-    username = serializers.ReadOnlyField(source='author.username')
-    first_name = serializers.ReadOnlyField(source='author.first_name')
-    last_name = serializers.ReadOnlyField(source='author.last_name')
-    is_subscribed = serializers.SerializerMethodField()
-    recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source='author.recipes.count')
-
-    class Meta:
-        model = Follow
-        fields = ('id', 'email', 'username', 'first_name', 'last_name',
-                  'is_subscribed', 'recipes', 'recipes_count')
-
-    def get_is_subscribed(self, obj):
-        return Follow.objects.filter(
-            user=obj.user, author=obj.author
-        ).exists()
-
-    def get_recipes(self, obj):
-        recipes = Recipe.objects.filter(author=obj.author)
-        return FavoriteRecipesSerializer(recipes, many=True).data
-
-
 class TagSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -133,7 +116,7 @@ class IngredientRecipeSerializerGet(serializers.ModelSerializer):
 class IngredientRecipeSerializerCreate(serializers.ModelSerializer):
 
     id = serializers.IntegerField()
-    amount = serializers.IntegerField()
+    amount = serializers.IntegerField(min_value=MINIMUM_AMOUNT_OF_INGREDIENT)
 
     class Meta:
         model = Ingredient
@@ -143,6 +126,7 @@ class IngredientRecipeSerializerCreate(serializers.ModelSerializer):
 class RecipeSerializerGet(serializers.ModelSerializer):
 
     image = Base64ImageField()
+    image_thumbnail = ThumbnailField()
     tags = TagSerializer(many=True, read_only=True)
     ingredients = IngredientRecipeSerializerGet(
         source='recipe',
@@ -156,21 +140,40 @@ class RecipeSerializerGet(serializers.ModelSerializer):
     class Meta:
 
         model = Recipe
-        fields = ('id', 'author', 'name', 'image', 'text',
-                  'ingredients', 'tags', 'cooking_time',
+        fields = ('id', 'author', 'name', 'image', 'image_thumbnail',
+                  'text', 'ingredients', 'tags', 'cooking_time',
                   'is_favorited', 'is_in_shopping_cart')
 
     def get_is_favorited(self, obj):
-        user = self.context['request'].user
-        return user.is_authenticated and Favorite.objects.filter(
-            user=user, recipe=obj
-        ).exists()
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
+        relations = get_user_relations(self.context['request'])
+        return obj.id in relations['favorites']
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context['request'].user
-        return user.is_authenticated and ShoppingCart.objects.filter(
-            user=user, recipe=obj
-        ).exists()
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
+        relations = get_user_relations(self.context['request'])
+        return obj.id in relations['shopping_cart']
+
+
+class IngredientMatchSerializer(serializers.Serializer):
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=INGREDIENT_MATCH_MAX_INGREDIENTS,
+    )
+
+
+class RecipeMatchSerializer(RecipeSerializerGet):
+
+    covered_ingredients = serializers.IntegerField(read_only=True)
+    missing_ingredients = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeSerializerGet.Meta):
+        fields = RecipeSerializerGet.Meta.fields + (
+            'covered_ingredients', 'missing_ingredients')
 
 
 class RecipeSerializerCreate(serializers.ModelSerializer):
@@ -189,22 +192,31 @@ class RecipeSerializerCreate(serializers.ModelSerializer):
                   'ingredients', 'tags', 'cooking_time')
         read_only_fields = ('author',)
 
-    def add_ingredients(self, ingredients, recipe):
+    def validate_ingredients(self, ingredients):
+        ids = [ingredient['id'] for ingredient in ingredients]
+        duplicates = sorted(
+            id for id, count in Counter(ids).items() if count > 1)
+        if duplicates:
+            raise serializers.ValidationError(
+                f'duplicate ingredients: {duplicates}')
+        found = Ingredient.objects.in_bulk(ids)
+        missing = [id for id in ids if id not in found]
+        if missing:
+            raise serializers.ValidationError(
+                f'ingredients do not exist: {missing}')
+        return [
+            {'ingredient': found[ingredient['id']],
+             'amount': ingredient['amount']}
+            for ingredient in ingredients
+        ]
 
-        bulk_list = []
-        for ingredient in ingredients:
-            id = ingredient['id']
-            amount = ingredient['amount']
-            ingredient_obj = get_object_or_404(Ingredient, id=id)
-            bulk_list.append(
-                IngredientRecipe(
-                    recipe=recipe,
-                    amount=amount,
-                    ingredient=ingredient_obj,
-                )
-            )
-        IngredientRecipe.objects.bulk_create(bulk_list)
+    def add_ingredients(self, ingredients, recipe):
+        IngredientRecipe.objects.bulk_create([
+            IngredientRecipe(recipe=recipe, **ingredient)
+            for ingredient in ingredients
+        ])
 
+    @transaction.atomic
     def create(self, validated_data):
 
         ingredients = validated_data.pop('ingredients')
@@ -212,53 +224,100 @@ class RecipeSerializerCreate(serializers.ModelSerializer):
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
         self.add_ingredients(ingredients, recipe)
+        self.process_image(recipe)
         return recipe
 
+    def process_image(self, recipe):
+        if recipe.image:
+            transaction.on_commit(
+                lambda: schedule_image_processing(recipe.pk))
+
+    def update_ingredients(self, recipe, ingredients):
+        current = {row.ingredient_id: row for row in recipe.recipe.all()}
+        submitted = {
+            ingredient['ingredient'].id: ingredient
+            for ingredient in ingredients
+        }
+        removed = current.keys() - submitted.keys()
+        if removed:
+            IngredientRecipe.objects.filter(
+                recipe=recipe, ingredient_id__in=removed
+            ).delete()
+        added, changed = [], []
+        for id, ingredient in submitted.items():
+            row = current.get(id)
+            if row is None:
+                added.append(ingredient)
+            elif row.amount != ingredient['amount']:
+                row.amount = ingredient['amount']
+                changed.append(row)
+        if changed:
+            IngredientRecipe.objects.bulk_update(changed, ['amount'])
+        if added:
+            self.add_ingredients(added, recipe)
+
+    def update_tags(self, recipe, tags):
+        current = set(recipe.tags.all())
+        removed = current - set(tags)
+        added = set(tags) - current
+        if removed:
+            recipe.tags.remove(*removed)
+        if added:
+            recipe.tags.add(*added)
+
+    @transaction.atomic
     def update(self, instance, validated_data):
 
         if 'ingredients' in validated_data:
-            ingredients = validated_data.pop('ingredients')
-            instance.ingredients.clear()
-            self.add_ingredients(ingredients, instance)
+            self.update_ingredients(
+                instance, validated_data.pop('ingredients'))
 
         if 'tags' in validated_data:
-            tags = validated_data.pop('tags')
-            instance.tags.set(tags)
+            self.update_tags(instance, validated_data.pop('tags'))
+
+        if 'image' in validated_data:
+            instance.image_thumbnail = None
+            instance = super().update(instance, validated_data)
+            self.process_image(instance)
+            return instance
 
         return super().update(instance, validated_data)
 
     def to_representation(self, instance):
+        request = self.context.get('request')
+        instance = Recipe.objects.with_read_relations(
+            request.user
+        ).get(pk=instance.pk)
         return RecipeSerializerGet(
-            instance, context={'request': self.context.get('request')}).data
+            instance, context={'request': request}).data
 
 
 class FavoriteRecipesSerializer(serializers.ModelSerializer):
 
+    image_thumbnail = ThumbnailField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'image_thumbnail', 'cooking_time')
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
+class SubscriptionsSerializer(UserSerializerGet):
 
-    class Meta:
-        model = Favorite
-        fields = ('user', 'recipe')
+    recipes = FavoriteRecipesSerializer(
+        source='latest_recipes', many=True, read_only=True
+    )
+    recipes_count = serializers.IntegerField(read_only=True)
 
-    def validate(self, data):
-        request = self.context.get('request')
-        if not request or request.user.is_anonymous:
-            return False
-        recipe = data['recipe']
-        if Favorite.objects.filter(user=request.user, recipe=recipe).exists():
-            raise serializers.ValidationError({
-                'status': 'its already favorite'
-            })
-        return data
+    class Meta:
+        model = User
+        fields = ('id', 'email', 'username', 'first_name', 'last_name',
+                  'is_subscribed', 'recipes', 'recipes_count')
 
 
-class ShoppingCartSerializer(serializers.ModelSerializer):
+class BulkIdsSerializer(serializers.Serializer):
 
-    class Meta:
-        fields = ('user', 'recipe')
-        model = ShoppingCart
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BULK_RELATIONS_MAX_IDS,
+    )
@@ -0,0 +1,52 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from foodgram.transactions import on_commit_batch
+from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from users.models import Follow, User
+
+from .cache import invalidate_on_commit
+from .matching import record_changes
+from .relations import RELATION_NAMES, invalidate_relation
+
+
+@receiver([post_save, post_delete], sender=Tag)
+def invalidate_tags(sender, **kwargs):
+    invalidate_on_commit('tags')
+
+
+@receiver([post_save, post_delete], sender=Ingredient)
+def invalidate_ingredients(sender, **kwargs):
+    invalidate_on_commit('ingredients')
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    invalidate_on_commit('recipes')
+    on_commit_batch(record_changes, instance.id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_on_commit('recipes')
+
+
+@receiver([post_save, post_delete], sender=User)
+def author_changed(sender, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    invalidate_on_commit('authors')
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+def recipe_counters_changed(sender, **kwargs):
+    invalidate_on_commit('recipe_counters')
+
+
+@receiver([post_save, post_delete], sender=Favorite)
+@receiver([post_save, post_delete], sender=ShoppingCart)
+@receiver([post_save, post_delete], sender=Follow)
+def user_relations_changed(sender, instance, **kwargs):
+    invalidate_relation(instance.user_id, RELATION_NAMES[sender])
@@ -0,0 +1,33 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from api.cache import get_version
+from recipes.models import Ingredient, Tag
+
+
+class CatalogVersionTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bumped_on_commit(self):
+        for namespace, create in (
+            ('tags', lambda: Tag.objects.create(
+                name='tag', color='#000000', slug='tag')),
+            ('ingredients', lambda: Ingredient.objects.create(
+                name='ingredient', measurement_unit='g')),
+        ):
+            with self.subTest(namespace=namespace):
+                version = get_version(namespace)
+                with transaction.atomic():
+                    create()
+                    self.assertEqual(get_version(namespace), version)
+                self.assertNotEqual(get_version(namespace), version)
+
+    def test_kept_on_rollback(self):
+        version = get_version('tags')
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Tag.objects.create(name='tag', color='#000000', slug='tag')
+            raise RuntimeError
+        self.assertEqual(get_version('tags'), version)
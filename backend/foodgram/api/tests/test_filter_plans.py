@@ -0,0 +1,108 @@
+import re
+from itertools import combinations
+
+from django.db import connection
+from django.test import RequestFactory, TestCase
+
+from api.filters import RecipeFilter
+from recipes.models import Favorite, Recipe, ShoppingCart, Tag
+from users.models import User
+
+SEQUENTIAL_SCAN = {
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (?:TABLE )?(\w+)(?!.*\bUSING\b)'),
+}
+THRESHOLD = 100
+AUTHORS = 5
+RECIPES = 500
+
+
+class RecipeFilterPlansTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        authors = [
+            User.objects.create(
+                username=f'author{i}', email=f'author{i}@example.org'
+            )
+            for i in range(AUTHORS)
+        ]
+        cls.user = authors[0]
+        cls.tags = [
+            Tag.objects.create(
+                name=f'tag {i}', color=f'#00000{i}', slug=f'tag-{i}'
+            )
+            for i in range(3)
+        ]
+        Recipe.objects.bulk_create([
+            Recipe(
+                name=f'recipe {i}', author=authors[i % AUTHORS],
+                text='text', cooking_time=10,
+            )
+            for i in range(RECIPES)
+        ])
+        recipes = list(Recipe.objects.order_by('id'))
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe=recipe, tag=cls.tags[i % 3])
+            for i, recipe in enumerate(recipes)
+        ])
+        Favorite.objects.bulk_create([
+            Favorite(user=author, recipe=recipe)
+            for author in authors
+            for recipe in recipes[::2]
+        ])
+        ShoppingCart.objects.bulk_create([
+            ShoppingCart(user=author, recipe=recipe)
+            for author in authors
+            for recipe in recipes[::3]
+        ])
+        cls.params = {
+            'tags': cls.tags[0].slug,
+            'author': authors[1].id,
+            'is_favorited': 1,
+            'is_in_shopping_cart': 1,
+        }
+
+    def large_tables(self):
+        tables = (
+            Recipe._meta.db_table,
+            Recipe.tags.through._meta.db_table,
+            Favorite._meta.db_table,
+            ShoppingCart._meta.db_table,
+        )
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for table in tables:
+                cursor.execute(f'SELECT COUNT(*) FROM {quote(table)}')
+                self.assertGreater(cursor.fetchone()[0], THRESHOLD, table)
+        return set(tables)
+
+    def get_pattern(self):
+        pattern = SEQUENTIAL_SCAN.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f'{connection.vendor} plans are not parsed')
+        return pattern
+
+    def test_detects_sequential_scan(self):
+        plan = Recipe.objects.filter(text='text').order_by().explain()
+        self.assertIn(
+            Recipe._meta.db_table, self.get_pattern().findall(plan)
+        )
+
+    def test_no_sequential_scans(self):
+        pattern = self.get_pattern()
+        large = self.large_tables()
+        for size in range(len(self.params) + 1):
+            for names in combinations(self.params, size):
+                with self.subTest(filters=names):
+                    data = {name: self.params[name] for name in names}
+                    request = RequestFactory().get('/api/recipes/', data)
+                    request.user = self.user
+                    plan = RecipeFilter(
+                        data,
+                        queryset=Recipe.objects.with_user_flags(self.user),
+                        request=request,
+                    ).qs[:6].explain()
+                    self.assertFalse(
+                        large & set(pattern.findall(plan)), plan
+                    )
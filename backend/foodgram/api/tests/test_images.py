@@ -0,0 +1,34 @@
+from tempfile import TemporaryDirectory
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+
+from recipes.images import run_in_background
+from recipes.models import Recipe
+from users.models import User
+
+
+class ImageProcessingTest(TestCase):
+
+    def setUp(self):
+        media = TemporaryDirectory()
+        self.addCleanup(media.cleanup)
+        settings = override_settings(MEDIA_ROOT=media.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        author = User.objects.create_user(
+            username='author', email='author@example.org', password='pass'
+        )
+        self.recipe = Recipe.objects.create(
+            name='recipe', author=author, text='text', cooking_time=10
+        )
+        self.recipe.image.save(
+            'broken.png', ContentFile(b'not an image'), save=True
+        )
+
+    def test_background_failure_is_logged(self):
+        with self.assertLogs('foodgram.images', 'ERROR') as logs:
+            run_in_background(self.recipe.id)
+        self.assertIn(f'recipe {self.recipe.id}', logs.output[0])
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image_thumbnail)
@@ -0,0 +1,118 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import (Favorite, Ingredient, IngredientRecipe, Recipe,
+                            ShoppingCart, Tag)
+from users.models import Follow, User
+
+# COUNT, the page, and the author, tag and ingredient prefetches.
+ANONYMOUS_LIST_QUERIES = 5
+# Plus the favorite, shopping cart and follow id sets of the user.
+AUTHENTICATED_LIST_QUERIES = ANONYMOUS_LIST_QUERIES + 3
+# The page with Exists() flags, its COUNT and the three prefetches.
+USER_FILTER_LIST_QUERIES = 5
+
+
+class RecipeListQueriesTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.org', password='pass'
+        )
+        cls.reader = User.objects.create_user(
+            username='reader', email='reader@example.org', password='pass'
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'tag {i}', color=f'#00000{i}', slug=f'tag-{i}'
+            )
+            for i in range(2)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'ingredient {i}', measurement_unit='g'
+            )
+            for i in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.anonymous = APIClient()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def create_recipes(self, count):
+        for i in range(count):
+            recipe = Recipe.objects.create(
+                name=f'recipe {i}', author=self.author, text='text',
+                cooking_time=10,
+            )
+            recipe.tags.set(self.tags)
+            IngredientRecipe.objects.bulk_create([
+                IngredientRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=i + 1
+                )
+                for ingredient in self.ingredients
+            ])
+            Favorite.objects.create(user=self.reader, recipe=recipe)
+            ShoppingCart.objects.create(user=self.reader, recipe=recipe)
+
+    def assert_list_queries(self, client, path, queries, recipes):
+        cache.clear()
+        with self.assertNumQueries(queries):
+            response = client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), recipes)
+        return response
+
+    def test_anonymous_list(self):
+        for count in (1, 6):
+            with self.subTest(recipes=count):
+                Recipe.objects.all().delete()
+                self.create_recipes(count)
+                response = self.assert_list_queries(
+                    self.anonymous, '/api/recipes/',
+                    ANONYMOUS_LIST_QUERIES, count
+                )
+                recipe = response.data['results'][0]
+                self.assertFalse(recipe['is_favorited'])
+                self.assertFalse(recipe['author']['is_subscribed'])
+
+    def test_authenticated_list(self):
+        for count in (1, 6):
+            with self.subTest(recipes=count):
+                Recipe.objects.all().delete()
+                self.create_recipes(count)
+                response = self.assert_list_queries(
+                    self.client, '/api/recipes/',
+                    AUTHENTICATED_LIST_QUERIES, count
+                )
+                recipe = response.data['results'][0]
+                self.assertTrue(recipe['is_favorited'])
+                self.assertTrue(recipe['is_in_shopping_cart'])
+                self.assertTrue(recipe['author']['is_subscribed'])
+                self.assertEqual(len(recipe['ingredients']), 3)
+                self.assertEqual(len(recipe['tags']), 2)
+
+    def test_authenticated_user_filter_list(self):
+        for count in (1, 6):
+            with self.subTest(recipes=count):
+                Recipe.objects.all().delete()
+                self.create_recipes(count)
+                response = self.assert_list_queries(
+                    self.client, '/api/recipes/?is_favorited=1',
+                    USER_FILTER_LIST_QUERIES, count
+                )
+                recipe = response.data['results'][0]
+                self.assertTrue(recipe['is_favorited'])
+                self.assertTrue(recipe['author']['is_subscribed'])
+
+    def test_cached_list(self):
+        self.create_recipes(6)
+        self.client.get('/api/recipes/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/recipes/')
+        self.assertEqual(len(response.data['results']), 6)
@@ -0,0 +1,124 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientRecipe, Recipe, Tag
+from users.models import User
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+# One UPDATE of search_vector on PostgreSQL, DELETE + INSERT of the FTS row
+# on SQLite.
+REINDEX_WRITES = 1 if connection.vendor == 'postgresql' else 2
+# The recipe row itself is saved on every PATCH to bump updated_at.
+RECIPE_WRITES = 1 + REINDEX_WRITES
+
+
+class RecipeUpdateQueriesTest(TransactionTestCase):
+    # Real commits, so the search index is rebuilt by the on_commit hooks
+    # inside the measured request.
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@example.org', password='pass'
+        )
+        self.tags = [
+            Tag.objects.create(
+                name=f'tag {i}', color=f'#00000{i}', slug=f'tag-{i}'
+            )
+            for i in range(3)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(
+                name=f'ingredient {i}', measurement_unit='g'
+            )
+            for i in range(4)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.recipe = Recipe.objects.create(
+            name='recipe', author=self.author, text='text', cooking_time=10
+        )
+        self.recipe.tags.set(self.tags[:2])
+        IngredientRecipe.objects.bulk_create([
+            IngredientRecipe(
+                recipe=self.recipe, ingredient=ingredient, amount=1
+            )
+            for ingredient in self.ingredients[:2]
+        ])
+
+    def ingredients_body(self, amounts):
+        return [
+            {'id': self.ingredients[index].id, 'amount': amount}
+            for index, amount in amounts.items()
+        ]
+
+    def patch(self, body):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f'/api/recipes/{self.recipe.id}/', body, format='json'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        return [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].lstrip().upper().startswith(WRITE_STATEMENTS)
+        ]
+
+    def assert_ingredients(self, amounts):
+        self.assertEqual(
+            dict(self.recipe.recipe.values_list('ingredient_id', 'amount')),
+            {
+                self.ingredients[index].id: amount
+                for index, amount in amounts.items()
+            },
+        )
+
+    def test_text_only(self):
+        writes = self.patch({'text': 'new text'})
+        self.assertEqual(len(writes), RECIPE_WRITES, writes)
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.text, 'new text')
+        self.assert_ingredients({0: 1, 1: 1})
+
+    def test_unchanged_ingredients_and_tags(self):
+        writes = self.patch({
+            'ingredients': self.ingredients_body({0: 1, 1: 1}),
+            'tags': [tag.id for tag in self.tags[:2]],
+        })
+        self.assertEqual(len(writes), RECIPE_WRITES, writes)
+
+    def test_add_ingredient(self):
+        writes = self.patch(
+            {'ingredients': self.ingredients_body({0: 1, 1: 1, 2: 3})})
+        self.assertEqual(len(writes), RECIPE_WRITES + 1, writes)
+        self.assert_ingredients({0: 1, 1: 1, 2: 3})
+
+    def test_change_ingredients(self):
+        writes = self.patch(
+            {'ingredients': self.ingredients_body({0: 2, 1: 3})})
+        self.assertEqual(len(writes), RECIPE_WRITES + 1, writes)
+        self.assert_ingredients({0: 2, 1: 3})
+
+    def test_remove_ingredient(self):
+        writes = self.patch({'ingredients': self.ingredients_body({0: 1})})
+        self.assertEqual(len(writes), RECIPE_WRITES + 1, writes)
+        self.assert_ingredients({0: 1})
+
+    def test_replace_ingredients(self):
+        writes = self.patch(
+            {'ingredients': self.ingredients_body({0: 5, 2: 1, 3: 1})})
+        # DELETE of the removed row, one UPDATE and one INSERT.
+        self.assertEqual(len(writes), RECIPE_WRITES + 3, writes)
+        self.assert_ingredients({0: 5, 2: 1, 3: 1})
+
+    def test_add_tag(self):
+        writes = self.patch({'tags': [tag.id for tag in self.tags]})
+        self.assertEqual(len(writes), RECIPE_WRITES + 1, writes)
+        self.assertEqual(set(self.recipe.tags.all()), set(self.tags))
+
+    def test_remove_tag(self):
+        writes = self.patch({'tags': [self.tags[0].id]})
+        self.assertEqual(len(writes), RECIPE_WRITES + 1, writes)
+        self.assertEqual(list(self.recipe.tags.all()), [self.tags[0]])
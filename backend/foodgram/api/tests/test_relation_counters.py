@@ -0,0 +1,75 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import User
+
+
+class RecipeCountersTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.org', password='pass'
+        )
+        cls.recipes = [
+            Recipe.objects.create(
+                name=f'recipe {i}', author=cls.user, text='text',
+                cooking_time=10,
+            )
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def counts(self, field):
+        return list(Recipe.objects.order_by('id').values_list(
+            field, flat=True
+        ))
+
+    def assert_no_recount(self, context):
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'].upper())
+
+    def test_single_toggle(self):
+        recipe = self.recipes[0]
+        for path, field in (('favorite', 'favorites_count'),
+                            ('shopping_cart', 'in_carts_count')):
+            with self.subTest(path=path):
+                url = f'/api/recipes/{recipe.id}/{path}/'
+                with CaptureQueriesContext(connection) as context:
+                    self.assertEqual(self.client.post(url).status_code, 201)
+                    self.assertEqual(self.client.post(url).status_code, 400)
+                self.assert_no_recount(context)
+                self.assertEqual(self.counts(field), [1, 0, 0])
+                with CaptureQueriesContext(connection) as context:
+                    self.assertEqual(self.client.delete(url).status_code, 204)
+                    self.assertEqual(self.client.delete(url).status_code, 204)
+                self.assert_no_recount(context)
+                self.assertEqual(self.counts(field), [0, 0, 0])
+
+    def test_bulk(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        ids = [recipe.id for recipe in self.recipes]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                '/api/recipes/favorite/', {'ids': ids}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assert_no_recount(context)
+        self.assertEqual(self.counts('favorites_count'), [1, 1, 1])
+        response = self.client.delete(
+            '/api/recipes/favorite/', {'ids': ids[:2] + [ids[-1] + 1]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['deleted', 'deleted', 'not_found'],
+        )
+        self.assertEqual(self.counts('favorites_count'), [0, 0, 1])
+        self.assertFalse(ShoppingCart.objects.exists())
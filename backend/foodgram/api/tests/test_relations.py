@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.test import TransactionTestCase
+
+from api.cache import get_version
+from api.relations import load_relations, pack, relation_namespace
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+
+class UserRelationsCacheTest(TransactionTestCase):
+    # Real commits, the versions are bumped by on_commit hooks.
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.org', password='pass'
+        )
+        self.recipe = Recipe.objects.create(
+            name='recipe', author=self.user, text='text', cooking_time=10
+        )
+
+    def add_favorite(self):
+        Favorite.objects.create(user=self.user, recipe=self.recipe)
+
+    def test_write_invalidates_cached_set(self):
+        self.assertEqual(load_relations(self.user)['favorites'], set())
+        self.add_favorite()
+        with self.assertNumQueries(1):
+            relations = load_relations(self.user)
+        self.assertEqual(relations['favorites'], {self.recipe.id})
+
+    def test_stale_load_is_not_served(self):
+        # A slow read took its version and rows before the write committed
+        # and stores them after it.
+        namespace = relation_namespace(self.user.id, 'favorites')
+        version = get_version(namespace)
+        self.add_favorite()
+        cache.set(f'{namespace}:{version}', pack(set()))
+        self.assertEqual(
+            load_relations(self.user)['favorites'], {self.recipe.id}
+        )
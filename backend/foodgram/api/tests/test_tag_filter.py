@@ -0,0 +1,134 @@
+import re
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import QueryDict
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api.filters import RecipeFilter
+from recipes.models import Recipe, Tag
+from users.models import User
+
+TAGS = 12
+RECIPES = 40
+TAGS_TABLE = Recipe.tags.through._meta.db_table
+DEDUPLICATION = {
+    'postgresql': re.compile(r'\b(?:Unique|HashAggregate)\b'),
+    'sqlite': re.compile(r'TEMP B-TREE FOR DISTINCT'),
+}
+# Joins against the tags table, other than the semi join EXISTS becomes.
+OUTER_JOIN = {
+    'postgresql': re.compile(
+        r'(?:Hash Join|Merge Join|Nested Loop(?! Semi))(?:.*\n)*?.*'
+        + TAGS_TABLE
+    ),
+    # Top level rows of EXPLAIN QUERY PLAN have parent 0.
+    'sqlite': re.compile(r'^\d+ 0 \d+ .*\b' + TAGS_TABLE + r'\b', re.M),
+}
+
+
+class RecipeTagFilterTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.org', password='pass'
+        )
+        cls.tags = [
+            Tag.objects.create(
+                name=f'tag {i}', color=f'#0000{i:02}', slug=f'tag-{i}'
+            )
+            for i in range(TAGS)
+        ]
+        for i in range(RECIPES):
+            recipe = Recipe.objects.create(
+                name=f'recipe {i}', author=author, text='text',
+                cooking_time=10,
+            )
+            # Recipes share tags in overlapping patterns, several have many
+            # matching tags and a few have none at all.
+            recipe.tags.set(
+                tag for j, tag in enumerate(cls.tags) if i % (j + 2) == 0
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def slugs(self, count):
+        return [tag.slug for tag in self.tags[:count]]
+
+    def legacy_ids(self, slugs):
+        return list(Recipe.objects.filter(
+            tags__slug__in=slugs
+        ).distinct().order_by('id').values_list('id', flat=True))
+
+    def filter_queryset(self, slugs):
+        data = QueryDict(mutable=True)
+        data.setlist('tags', slugs)
+        return RecipeFilter(data, queryset=Recipe.objects.all()).qs
+
+    def filter_ids(self, slugs):
+        queryset = self.filter_queryset(slugs)
+        self.assertFalse(queryset.query.distinct)
+        return list(queryset.order_by('id').values_list('id', flat=True))
+
+    def plan_problems(self, queryset):
+        if connection.vendor not in DEDUPLICATION:
+            self.skipTest(f'{connection.vendor} plans are not parsed')
+        plan = queryset[:6].explain()
+        problems = []
+        if DEDUPLICATION[connection.vendor].search(plan):
+            problems.append('deduplication')
+        if OUTER_JOIN[connection.vendor].search(plan):
+            problems.append('join')
+        return problems, plan
+
+    def test_matches_distinct_join(self):
+        for count in (1, 3, 10):
+            with self.subTest(tags=count):
+                slugs = self.slugs(count)
+                legacy = self.legacy_ids(slugs)
+                self.assertTrue(legacy)
+                self.assertEqual(self.filter_ids(slugs), legacy)
+
+    def test_plan_has_no_join_or_distinct(self):
+        for count in (1, 3, 10):
+            with self.subTest(tags=count):
+                slugs = self.slugs(count)
+                problems, plan = self.plan_problems(
+                    self.filter_queryset(slugs)
+                )
+                self.assertEqual(problems, [], plan)
+                # The legacy query shows what the checks catch.
+                problems, plan = self.plan_problems(Recipe.objects.filter(
+                    tags__slug__in=slugs
+                ).distinct())
+                self.assertEqual(problems, ['deduplication', 'join'], plan)
+
+    def api_ids(self, slugs):
+        client = APIClient()
+        url = '/api/recipes/?' + urlencode({'tags': slugs}, doseq=True)
+        ids = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(recipe['id'] for recipe in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(response.data['count'], len(ids))
+        return ids
+
+    def test_api_returns_each_recipe_once(self):
+        for count in (1, 3, 10):
+            with self.subTest(tags=count):
+                slugs = self.slugs(count)
+                ids = self.api_ids(slugs)
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(sorted(ids), self.legacy_ids(slugs))
+
+    def test_no_tags(self):
+        self.assertEqual(
+            self.filter_ids([]),
+            list(Recipe.objects.order_by('id').values_list('id', flat=True)),
+        )
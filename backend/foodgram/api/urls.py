@@ -5,7 +5,8 @@ from .views import (TagViewSet, RecipeViewSet,
                     IngredientViewSet, CustomUserViewSet,
                     APIFollow, subscriptions,
                     APIFavorite, APIShoppingCart,
-                    download_shopping_cart)
+                    download_shopping_cart, feed,
+                    match_by_ingredients)
 
 
 router = routers.DefaultRouter()
@@ -18,8 +19,13 @@ router.register(r'users', CustomUserViewSet, basename='users')
 urlpatterns = [
     path('users/subscriptions/', subscriptions),
     path('recipes/download_shopping_cart/', download_shopping_cart),
+    path('recipes/feed/', feed),
+    path('recipes/by_ingredients/', match_by_ingredients),
+    path('users/subscribe/', APIFollow.as_view()),
     path('users/<int:id>/subscribe/', APIFollow.as_view()),
+    path('recipes/favorite/', APIFavorite.as_view()),
     path('recipes/<int:id>/favorite/', APIFavorite.as_view()),
+    path('recipes/shopping_cart/', APIShoppingCart.as_view()),
     path('recipes/<int:id>/shopping_cart/', APIShoppingCart.as_view()),
     path('', include(router.urls)),
     path('auth/', include('djoser.urls.authtoken')),
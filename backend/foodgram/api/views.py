@@ -1,66 +1,101 @@
-from django.http import FileResponse
-from django.shortcuts import get_object_or_404
-from django.db.models import Sum
+from functools import partial
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import condition
+from django.db.models import (Count, Max, Prefetch, Sum, Value,
+                              prefetch_related_objects)
+from django.db.models.functions import Coalesce
 from django_filters.rest_framework import DjangoFilterBackend
 
-from rest_framework import viewsets, status, permissions
-from rest_framework.views import APIView
+from rest_framework import generics, viewsets, permissions
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import (api_view, permission_classes,
+                                       renderer_classes)
 
-from users.models import User, Follow
-from recipes.models import (IngredientRecipe, Recipe, Tag,
+from users.models import User, Follow, annotate_is_subscribed
+from recipes.counters import change_count
+from recipes.feed import backfill, remove
+from recipes.models import (FeedEntry, IngredientRecipe, Recipe, Tag,
                             Ingredient, Favorite, ShoppingCart)
 
+from .bulk import BulkRelationView
+from .cache import (CachedResponseMixin, conditional_response, get_version,
+                    invalidate_on_commit, merge_user_flags,
+                    response_key)
 from .filters import IngredientsSearchFilter, RecipeFilter
-from .pagination import RecipePagination
+from .pagination import (FollowingFeedPagination, RecipeFeedPagination,
+                         RecipePagination)
 from .permissions import IsAuthorAdminOrReadOnly
-from .serializers import (ShoppingCartSerializer, TagSerializer,
+from .matching import match_recipes
+from .relations import get_user_relations
+from .renderers import SHOPPING_CART_RENDERERS
+from .serializers import (TagSerializer,
                           RecipeSerializerGet, RecipeSerializerCreate,
-                          IngredientSerializer, FollowSerializer,
-                          SubscriptionsSerializer, FavoriteSerializer)
+                          IngredientMatchSerializer, RecipeMatchSerializer,
+                          IngredientSerializer, SubscriptionsSerializer)
 
 from djoser.views import UserViewSet
+from foodgram.metrics import CACHE_REQUESTS, count_export_size
+from foodgram.settings import SUBSCRIPTION_RECIPES_LIMIT
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'tags'
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(CachedResponseMixin, viewsets.ReadOnlyModelViewSet):
+    cache_namespace = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     permission_classes = [permissions.AllowAny]
     pagination_class = None
     filter_backends = [IngredientsSearchFilter]
-    search_fields = ['^name']
 
 
 class CustomUserViewSet(UserViewSet):
     pagination_class = RecipePagination
 
+    def get_queryset(self):
+        return annotate_is_subscribed(
+            super().get_queryset(), self.request.user
+        )
 
-class APIFollow(APIView):
 
-    permission_classes = [permissions.IsAuthenticated]
+class APIFollow(BulkRelationView):
 
-    def post(self, request, id):
-        data = {'author': id, 'user': request.user.id}
-        serializer = FollowSerializer(
-            data=data, context={'request': request})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    model = Follow
+    target_model = User
+    field = 'author'
+    relation = 'following'
+    invalid_message = 'you cant subscribe on yourselph'
+    exists_message = 'you are already subscribed'
 
-    def delete(self, request, id):
-        user = request.user
-        author = get_object_or_404(User, id=id)
-        follow = Follow.objects.filter(user=user, author=author)
-        follow.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+    def get_invalid_ids(self, request):
+        return {request.user.id}
+
+    def changed(self, request, ids, added):
+        for author_id in ids:
+            if added:
+                backfill(request.user.id, author_id)
+            else:
+                remove(request.user.id, author_id)
+
+
+def get_recipes_limit(request):
+    try:
+        limit = int(request.query_params['recipes_limit'])
+    except (KeyError, ValueError):
+        return SUBSCRIPTION_RECIPES_LIMIT
+    return max(limit, 0)
 
 
 @api_view(['GET'])
@@ -68,20 +103,153 @@ class APIFollow(APIView):
 def subscriptions(request):
 
     paginator = RecipePagination()
-    user = request.user
-    subbed_on = Follow.objects.filter(user=user)
-    result = paginator.paginate_queryset(subbed_on, request)
-    serializer = SubscriptionsSerializer(result, many=True)
+    authors = User.objects.filter(
+        following__user=request.user
+    ).annotate(
+        recipes_count=Coalesce('profile__recipes_count', 0),
+        is_subscribed=Value(True),
+    ).order_by('-following__sub_date')
+    result = paginator.paginate_queryset(authors, request)
+    recipes = Recipe.objects.latest_by_authors(
+        [author.id for author in result], get_recipes_limit(request)
+    )
+    prefetch_related_objects(
+        result,
+        Prefetch('recipes', queryset=recipes, to_attr='latest_recipes'),
+    )
+    serializer = SubscriptionsSerializer(
+        result, many=True, context={'request': request}
+    )
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def feed(request):
+
+    paginator = FollowingFeedPagination()
+    entries = paginator.paginate_queryset(
+        FeedEntry.objects.filter(user=request.user), request
+    )
+    recipes = Recipe.objects.with_read_relations(request.user).in_bulk(
+        [entry.recipe_id for entry in entries]
+    )
+    serializer = RecipeSerializerGet(
+        [recipes[entry.recipe_id] for entry in entries
+         if entry.recipe_id in recipes],
+        many=True, context={'request': request}
+    )
+    return paginator.get_paginated_response(serializer.data)
+
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+def match_by_ingredients(request):
+
+    query = IngredientMatchSerializer(data=request.data)
+    query.is_valid(raise_exception=True)
+    paginator = RecipePagination()
+    matches = paginator.paginate_queryset(
+        match_recipes(query.validated_data['ingredients']), request
+    )
+    recipes = Recipe.objects.with_read_relations(request.user).in_bulk(
+        [recipe_id for recipe_id, _, _ in matches]
+    )
+    page = []
+    for recipe_id, covered, missing in matches:
+        if recipe_id in recipes:
+            recipe = recipes[recipe_id]
+            recipe.covered_ingredients = covered
+            recipe.missing_ingredients = missing
+            page.append(recipe)
+    serializer = RecipeMatchSerializer(
+        page, many=True, context={'request': request}
+    )
     return paginator.get_paginated_response(serializer.data)
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
 
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = RecipeFilter
+    ordering_fields = ('date', 'favorites_count', 'in_carts_count')
     permission_classes = [IsAuthorAdminOrReadOnly]
-    pagination_class = RecipePagination
-    queryset = Recipe.objects.all()
+    pagination_class = RecipeFeedPagination
+    user_filters = ('is_favorited', 'is_in_shopping_cart')
+
+    def get_queryset(self):
+        return Recipe.objects.with_read_relations(self.request.user)
+
+    def get_catalog_version(self):
+        return ':'.join(
+            get_version(namespace)
+            for namespace in ('tags', 'ingredients', 'authors')
+        )
+
+    def get_list_version(self):
+        version = f'{self.get_catalog_version()}:{get_version("recipes")}'
+        if OrderingFilter.ordering_param in self.request.query_params:
+            version += f':{get_version("recipe_counters")}'
+        return version
+
+    def get_relations_version(self):
+        return ':'.join(
+            str(sorted(ids))
+            for ids in get_user_relations(self.request).values()
+        )
+
+    def get_flags_version(self, recipe):
+        relations = get_user_relations(self.request)
+        return (f'{recipe["id"] in relations["favorites"]}:'
+                f'{recipe["id"] in relations["shopping_cart"]}:'
+                f'{recipe["author_id"] in relations["following"]}')
+
+    def get_anonymous_page(self, version):
+        key = response_key('recipes', version, self.request)
+        data = cache.get(key)
+        CACHE_REQUESTS.labels(
+            'recipes', 'miss' if data is None else 'hit'
+        ).inc()
+        if data is None:
+            page = self.paginate_queryset(self.filter_queryset(
+                Recipe.objects.with_read_relations(AnonymousUser())
+            ))
+            serializer = self.get_serializer(page, many=True)
+            data = self.get_paginated_response(serializer.data).data
+            cache.set(key, data, settings.API_CACHE_TIMEOUT)
+        return data
+
+    def list(self, request, *args, **kwargs):
+        if (request.accepted_renderer.format != 'json'
+                or any(name in request.query_params
+                       for name in self.user_filters)):
+            return super().list(request, *args, **kwargs)
+        version = self.get_list_version()
+        etag = md5(
+            f'{version}:{self.get_relations_version()}'.encode()
+        ).hexdigest()
+        return conditional_response(request, etag, None, lambda: Response(
+            merge_user_flags(
+                self.get_anonymous_page(version), get_user_relations(request)
+            )
+        ))
+
+    def retrieve(self, request, *args, **kwargs):
+        recipe = generics.get_object_or_404(
+            Recipe.objects.values('id', 'author_id', 'date', 'updated_at'),
+            pk=kwargs['pk'],
+        )
+        etag = md5((
+            f'{recipe["id"]}:{recipe["date"]}:{recipe["updated_at"]}:'
+            f'{self.get_catalog_version()}:{self.get_flags_version(recipe)}'
+        ).encode()).hexdigest()
+        last_modified = (
+            recipe['updated_at'] if request.user.is_anonymous else None
+        )
+        return conditional_response(
+            request, etag, last_modified,
+            partial(super().retrieve, request, *args, **kwargs),
+        )
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -95,71 +263,100 @@ class RecipeViewSet(viewsets.ModelViewSet):
         return serializer.save()
 
 
-class APIFavorite(APIView):
+class APIFavorite(BulkRelationView):
+
+    model = Favorite
+    target_model = Recipe
+    field = 'recipe'
+    relation = 'favorites'
+    exists_message = 'its already favorite'
+
+    def changed(self, request, ids, added):
+        invalidate_on_commit('recipe_counters')
+        change_count(
+            Recipe.objects.filter(pk__in=ids), 'favorites_count',
+            1 if added else -1
+        )
 
-    permission_classes = [permissions.IsAuthenticated]
 
-    def post(self, request, id):
-        data = {'recipe': id, 'user': request.user.id}
-        serializer = FavoriteSerializer(data=data,
-                                        context={'request': request})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+class APIShoppingCart(BulkRelationView):
 
-    def delete(self, request, id):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=id)
-        favorite = Favorite.objects.filter(user=user, recipe=recipe)
-        favorite.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+    model = ShoppingCart
+    target_model = Recipe
+    field = 'recipe'
+    relation = 'shopping_cart'
+    exists_message = 'its already in shopping cart'
 
+    def changed(self, request, ids, added):
+        invalidate_on_commit('recipe_counters')
+        change_count(
+            Recipe.objects.filter(pk__in=ids), 'in_carts_count',
+            1 if added else -1
+        )
 
-class APIShoppingCart(APIView):
 
-    permission_classes = [permissions.IsAuthenticated]
+def get_shopping_cart_state(request):
+    if not hasattr(request, '_shopping_cart_state'):
+        state = ShoppingCart.objects.filter(
+            user=request.user
+        ).aggregate(
+            count=Count('id'),
+            recipes=Sum('recipe_id'),
+            added=Max('added'),
+            updated_at=Max('recipe__updated_at'),
+        )
+        changes = [
+            date for date in (state['added'], state['updated_at']) if date
+        ]
+        state['last_modified'] = max(changes, default=None)
+        request._shopping_cart_state = state
+    return request._shopping_cart_state
 
-    def post(self, request, id):
-        data = {'recipe': id, 'user': request.user.id}
-        serializer = ShoppingCartSerializer(data=data,
-                                            context={'request': request})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    def delete(self, request, id):
-        user = request.user
-        recipe = get_object_or_404(Recipe, id=id)
-        shopping_cart = ShoppingCart.objects.filter(user=user, recipe=recipe)
-        shopping_cart.delete()
-        return Response(status=status.HTTP_204_NO_CONTENT)
+def shopping_cart_etag(request):
+    state = get_shopping_cart_state(request)
+    return md5(
+        f'{request.accepted_renderer.format}:{get_version("ingredients")}:'
+        f'{state["count"]}:{state["recipes"]}:{state["added"]}:'
+        f'{state["updated_at"]}'.encode()
+    ).hexdigest()
+
+
+def shopping_cart_last_modified(request):
+    return get_shopping_cart_state(request)['last_modified']
 
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@renderer_classes(SHOPPING_CART_RENDERERS)
+@condition(etag_func=shopping_cart_etag,
+           last_modified_func=shopping_cart_last_modified)
 def download_shopping_cart(request):
 
-    user = request.user
     ingredients = IngredientRecipe.objects.filter(
-        recipe__shopping_cart__user=user
-    )
-
-    ingredients = ingredients.values(
+        recipe__shopping_cart__user=request.user
+    ).values_list(
         'ingredient__name',
         'ingredient__measurement_unit',
     ).annotate(
         amount=Sum('amount')
+    ).order_by(
+        'ingredient__name',
+        'ingredient__measurement_unit',
     )
 
-    shopping_cart = '\n'.join([
-        f'{ingredient["ingredient__name"]} '
-        f'({ingredient["ingredient__measurement_unit"]}) – '
-        f'{ingredient["amount"]}'
-        for ingredient in ingredients
-    ])
-
-    response = FileResponse(shopping_cart, content_type='text')
-    response['Content-Disposition'] = ('attachment;'
-                                       'filename=shopping_cart.txt')
+    renderer = request.accepted_renderer
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type += f'; charset={renderer.charset}'
+    response = StreamingHttpResponse(
+        count_export_size(
+            renderer.stream(ingredients.iterator()), renderer.format
+        ),
+        content_type=content_type,
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename=shopping_cart.{renderer.format}'
+    )
 
     return response
@@ -0,0 +1,106 @@
+import os
+from functools import lru_cache
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               generate_latest, multiprocess)
+
+REQUEST_LATENCY = Histogram(
+    'foodgram_request_latency_seconds',
+    'Request latency by view',
+    ['view', 'method', 'status'],
+)
+REQUEST_QUERIES = Histogram(
+    'foodgram_request_queries',
+    'Database queries per request by view',
+    ['view'],
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500),
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests',
+    'API response cache lookups',
+    ['namespace', 'result'],
+)
+SHOPPING_CART_EXPORT_BYTES = Histogram(
+    'foodgram_shopping_cart_export_bytes',
+    'Size of shopping cart downloads',
+    ['format'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+
+
+@lru_cache(maxsize=None)
+def worker_gauges():
+    # Unlabelled multiprocess gauges open their per-process file as soon as
+    # they are created, so only processes that serve requests create them,
+    # not management commands.
+    workers = Gauge(
+        'foodgram_workers',
+        'Live application worker processes',
+        multiprocess_mode='livesum',
+    )
+    requests = Gauge(
+        'foodgram_worker_requests',
+        'Requests handled by each live worker process',
+        multiprocess_mode='liveall',
+    )
+    return workers, requests
+
+
+def count_export_size(chunks, format):
+    size = 0
+    for chunk in chunks:
+        size += len(chunk.encode() if isinstance(chunk, str) else chunk)
+        yield chunk
+    SHOPPING_CART_EXPORT_BYTES.labels(format).observe(size)
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        workers, self.worker_requests = worker_gauges()
+        workers.set(1)
+
+    def __call__(self, request):
+        queries = QueryCounter()
+        started = perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = perf_counter() - started
+        match = request.resolver_match
+        view = match.view_name if match else 'unmatched'
+        REQUEST_LATENCY.labels(
+            view, request.method, response.status_code
+        ).observe(duration)
+        REQUEST_QUERIES.labels(view).observe(queries.count)
+        self.worker_requests.inc()
+        return response
+
+
+def metrics(request):
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(
+        generate_latest(registry), content_type=CONTENT_TYPE_LATEST
+    )
@@ -0,0 +1,106 @@
+import json
+import logging
+import re
+import traceback
+from collections import Counter
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger('foodgram.requests')
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+IN_LISTS = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+
+
+def fingerprint(sql):
+    return IN_LISTS.sub('(...)', LITERALS.sub('%s', sql))
+
+
+class QueryRecorder:
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.count = 0
+        self.duration = 0
+        self.fingerprints = Counter()
+        self.stacks = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += perf_counter() - started
+            self.count += 1
+            key = fingerprint(sql)
+            self.fingerprints[key] += 1
+            if self.fingerprints[key] == self.threshold:
+                self.stacks[key] = ''.join(traceback.format_stack()[:-1])
+
+    def duplicates(self):
+        return {
+            sql: count for sql, count in self.fingerprints.items()
+            if count > 1
+        }
+
+
+class RequestProfilingMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = settings.REQUEST_PROFILING_N_PLUS_ONE_THRESHOLD
+
+    def __call__(self, request):
+        recorder = QueryRecorder(self.threshold)
+        request._render_duration = 0
+        started = perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        total = perf_counter() - started
+        self.report(request, response, recorder, total)
+        return response
+
+    def process_template_response(self, request, response):
+        started = perf_counter()
+
+        def rendered(response):
+            request._render_duration = perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def report(self, request, response, recorder, total):
+        render = request._render_duration
+        app = total - recorder.duration - render
+        response['Server-Timing'] = ', '.join((
+            f'db;dur={recorder.duration * 1000:.1f};'
+            f'desc="{recorder.count} queries"',
+            f'app;dur={app * 1000:.1f}',
+            f'render;dur={render * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ))
+        match = request.resolver_match
+        duplicates = recorder.duplicates()
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'duplicate_queries': sum(duplicates.values()) - len(duplicates),
+            'db_ms': round(recorder.duration * 1000, 3),
+            'app_ms': round(app * 1000, 3),
+            'render_ms': round(render * 1000, 3),
+            'total_ms': round(total * 1000, 3),
+        }))
+        for sql, stack in recorder.stacks.items():
+            logger.warning(
+                'Possible N+1: %s executed %d times in %s %s\n%s',
+                sql, recorder.fingerprints[sql],
+                request.method, request.path, stack,
+            )
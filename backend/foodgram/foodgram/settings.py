@@ -41,8 +41,15 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'foodgram.middleware.RequestProfilingMiddleware',
+    'foodgram.metrics.MetricsMiddleware',
 ]
 
+REQUEST_PROFILING = os.getenv('REQUEST_PROFILING', default='') == 'True'
+REQUEST_PROFILING_N_PLUS_ONE_THRESHOLD = 10
+
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', default='True') == 'True'
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -84,6 +91,34 @@ DATABASES = {
 }
 '''
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+
+API_CACHE_TIMEOUT = int(os.getenv('API_CACHE_TIMEOUT', default=60 * 60))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'foodgram': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -116,12 +151,33 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+DEFAULT_FILE_STORAGE = 'foodgram.storage.ContentAddressedStorage'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 EXC_NAME = 'me'
 MINIMUM_AMOUNT_OF_INGREDIENT = 1
 MINIMUM_COOKING_TIME = 1
+SUBSCRIPTION_RECIPES_LIMIT = 3
+FEED_BACKFILL_LIMIT = 50
+BULK_RELATIONS_MAX_IDS = 100
+INGREDIENT_SEARCH_LIMIT = 20
+INGREDIENT_INDEX_MAX_CHANGES = 1000
+INGREDIENT_MATCH_MAX_INGREDIENTS = 100
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', default='russian')
+PAGINATION_ESTIMATE_THRESHOLD = 10000
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
+IMAGE_MAX_UPLOAD_SIZE = 5 * 1024 * 1024
+IMAGE_MAX_RESOLUTION = (1280, 1280)
+IMAGE_THUMBNAIL_SIZE = (400, 400)
+IMAGE_FORMAT = 'WEBP'
+IMAGE_PROCESSING = os.getenv('IMAGE_PROCESSING', default='thread')
+IMAGE_PROCESSING_WORKERS = int(
+    os.getenv('IMAGE_PROCESSING_WORKERS', default=2)
+)
 
 
 REST_FRAMEWORK = {
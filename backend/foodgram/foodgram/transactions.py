@@ -0,0 +1,34 @@
+from threading import local
+
+from django.db import transaction
+
+batches = local()
+
+
+class Batch:
+
+    def __init__(self, func):
+        self.func = func
+        self.items = set()
+
+    def __call__(self):
+        self.func(self.items)
+
+
+def is_registered(connection, batch):
+    return any(entry[1] is batch for entry in connection.run_on_commit)
+
+
+def on_commit_batch(func, item, using=None):
+    # Calls func once per transaction with every item collected in it,
+    # instead of once per saved or deleted row.
+    connection = transaction.get_connection(using)
+    if not connection.in_atomic_block:
+        return func({item})
+    pending = batches.__dict__.setdefault('pending', {})
+    key = (connection.alias, func)
+    batch = pending.get(key)
+    if batch is None or not is_registered(connection, batch):
+        batch = pending[key] = Batch(func)
+        transaction.on_commit(batch, using=using)
+    batch.items.add(item)
@@ -0,0 +1,23 @@
+import os
+import shutil
+
+bind = '0:8000'
+# Only the server processes export multiprocess metrics, commands run with
+# docker exec keep the default registry.
+raw_env = ['PROMETHEUS_MULTIPROC_DIR=/tmp/metrics']
+
+
+def on_starting(server):
+    directory = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+
+def child_exit(server, worker):
+    # prometheus_client picks its value class on import, so it is imported
+    # only after raw_env has set the directory for the forked workers.
+    from prometheus_client import multiprocess
+
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
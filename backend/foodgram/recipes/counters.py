@@ -0,0 +1,54 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Profile, User
+
+from .models import Favorite, Recipe, ShoppingCart
+
+
+def count_of(model, field, outer='pk'):
+    return Coalesce(Subquery(
+        model.objects.filter(
+            **{field: OuterRef(outer)}
+        ).order_by().values(field).annotate(
+            count=Count('pk')
+        ).values('count')
+    ), 0)
+
+
+def change_count(queryset, field, delta):
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def repair(queryset, field, actual):
+    return queryset.annotate(actual=actual).exclude(
+        **{field: F('actual')}
+    ).update(**{field: actual})
+
+
+def recount():
+    Profile.objects.bulk_create(
+        [
+            Profile(user_id=pk) for pk in User.objects.filter(
+                profile__isnull=True
+            ).values_list('pk', flat=True)
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return {
+        'favorites_count': repair(
+            Recipe.objects.all(), 'favorites_count',
+            count_of(Favorite, 'recipe'),
+        ),
+        'in_carts_count': repair(
+            Recipe.objects.all(), 'in_carts_count',
+            count_of(ShoppingCart, 'recipe'),
+        ),
+        'recipes_count': repair(
+            Profile.objects.all(), 'recipes_count',
+            count_of(Recipe, 'author', outer='user'),
+        ),
+    }
@@ -0,0 +1,66 @@
+from itertools import islice
+
+from django.conf import settings
+
+from users.models import Follow
+
+from .models import FeedEntry, Recipe
+
+BATCH_SIZE = 1000
+
+
+def insert_entries(entries):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, BATCH_SIZE))
+        if not batch:
+            return
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def latest_recipes(author_id):
+    return list(Recipe.objects.filter(
+        author_id=author_id
+    ).order_by('-date', '-id').values_list(
+        'id', 'date'
+    )[:settings.FEED_BACKFILL_LIMIT])
+
+
+def fan_out(recipe):
+    followers = Follow.objects.filter(
+        author_id=recipe.author_id
+    ).values_list('user_id', flat=True)
+    insert_entries(
+        FeedEntry(user_id=user_id, recipe_id=recipe.id, date=recipe.date)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    insert_entries(
+        FeedEntry(user_id=user_id, recipe_id=recipe_id, date=date)
+        for recipe_id, date in latest_recipes(author_id)
+    )
+
+
+def remove(user_id, author_id):
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def rebuild():
+    FeedEntry.objects.all().delete()
+    authors = Follow.objects.values_list(
+        'author_id', flat=True
+    ).distinct().order_by()
+    for author_id in authors.iterator():
+        recipes = latest_recipes(author_id)
+        followers = Follow.objects.filter(
+            author_id=author_id
+        ).values_list('user_id', flat=True)
+        insert_entries(
+            FeedEntry(user_id=user_id, recipe_id=recipe_id, date=date)
+            for user_id in followers.iterator()
+            for recipe_id, date in recipes
+        )
@@ -0,0 +1,95 @@
+import base64
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from api.cache import invalidate
+
+DECODE_CHUNK_SIZE = 64 * 1024
+SPOOL_SIZE = 1024 * 1024
+
+logger = logging.getLogger('foodgram.images')
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS,
+    thread_name_prefix='images',
+)
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def decode_base64(encoded, name):
+    if len(encoded) // 4 * 3 > settings.IMAGE_MAX_UPLOAD_SIZE:
+        raise ImageTooLarge(
+            f'Image is larger than {settings.IMAGE_MAX_UPLOAD_SIZE} bytes'
+        )
+    file = SpooledTemporaryFile(max_size=SPOOL_SIZE)
+    for start in range(0, len(encoded), DECODE_CHUNK_SIZE):
+        file.write(
+            base64.b64decode(encoded[start:start + DECODE_CHUNK_SIZE])
+        )
+    file.seek(0)
+    return File(file, name=f'image.{name}')
+
+
+def render(directory, image, size):
+    image = image.copy()
+    image.thumbnail(size)
+    buffer = BytesIO()
+    image.save(buffer, format=settings.IMAGE_FORMAT, quality=85)
+    extension = settings.IMAGE_FORMAT.lower()
+    return default_storage.save(
+        f'{directory}image.{extension}', ContentFile(buffer.getvalue())
+    )
+
+
+def process_recipe_image(recipe_id):
+    from .models import Recipe
+
+    recipe = Recipe.objects.filter(pk=recipe_id).only('image').first()
+    if recipe is None or not recipe.image:
+        return
+    original = recipe.image.name
+    with recipe.image.open('rb') as file:
+        image = ImageOps.exif_transpose(Image.open(file))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    updated = Recipe.objects.filter(pk=recipe_id, image=original).update(
+        image=render('images/', image, settings.IMAGE_MAX_RESOLUTION),
+        image_thumbnail=render(
+            'images/thumbnails/', image, settings.IMAGE_THUMBNAIL_SIZE
+        ),
+        updated_at=timezone.now(),
+    )
+    if updated:
+        invalidate('recipes')
+
+
+def run_in_background(recipe_id):
+    # Nothing waits on the future, so failures are logged here; the recipe
+    # keeps serving its original image.
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception('Image processing failed for recipe %s', recipe_id)
+    finally:
+        close_old_connections()
+
+
+def schedule_image_processing(recipe_id):
+    if settings.IMAGE_PROCESSING == 'sync':
+        process_recipe_image(recipe_id)
+    else:
+        executor.submit(run_in_background, recipe_id)
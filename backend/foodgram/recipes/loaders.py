@@ -0,0 +1,169 @@
+import csv
+import json
+from io import StringIO
+from itertools import islice
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import UniqueConstraint
+
+BATCH_SIZE = 1000
+READ_SIZE = 64 * 1024
+
+
+def iter_json_array(file):
+    decoder = json.JSONDecoder()
+    buffer = ''
+    opened = False
+    for chunk in iter(lambda: file.read(READ_SIZE), ''):
+        buffer += chunk
+        while True:
+            buffer = buffer.lstrip(' \t\r\n,')
+            if not opened:
+                if not buffer:
+                    break
+                if buffer[0] != '[':
+                    raise ValueError('JSON file must contain an array')
+                buffer = buffer[1:]
+                opened = True
+                continue
+            if buffer.startswith(']'):
+                return
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                break
+            buffer = buffer[end:]
+            yield item
+    raise ValueError('Unexpected end of JSON file')
+
+
+def read_rows(path, fields):
+    with open(path, encoding='utf-8') as file:
+        if path.endswith('.json'):
+            for item in iter_json_array(file):
+                yield tuple(item[field] for field in fields)
+        else:
+            for row in csv.reader(file):
+                if row:
+                    yield tuple(row[:len(fields)])
+
+
+def unique_keys(model, fields):
+    keys = [(field,) for field in fields
+            if model._meta.get_field(field).unique]
+    keys += [
+        constraint.fields for constraint in model._meta.constraints
+        if isinstance(constraint, UniqueConstraint)
+    ]
+    return [tuple(fields.index(field) for field in key) for key in keys]
+
+
+def unique_rows(rows, key_indexes):
+    seen = [set() for _ in key_indexes]
+    for row in rows:
+        keys = [tuple(row[i] for i in index) for index in key_indexes]
+        if any(key in known for key, known in zip(keys, seen)):
+            continue
+        for key, known in zip(keys, seen):
+            known.add(key)
+        yield row
+
+
+class CSVStream:
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.buffer = ''
+
+    def read(self, size=-1):
+        writer_buffer = StringIO()
+        writer = csv.writer(writer_buffer)
+        while size < 0 or len(self.buffer) < size:
+            batch = list(islice(self.rows, BATCH_SIZE))
+            if not batch:
+                break
+            writer.writerows(batch)
+            self.buffer += writer_buffer.getvalue()
+            writer_buffer.seek(0)
+            writer_buffer.truncate()
+        if size < 0:
+            size = len(self.buffer)
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+
+def copy_rows(model, fields, rows):
+    table = model._meta.db_table
+    columns = ', '.join(
+        model._meta.get_field(field).column for field in fields
+    )
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMP TABLE staging ON COMMIT DROP AS '
+            f'SELECT {columns} FROM {table} WITH NO DATA'
+        )
+        cursor.copy_expert(
+            f'COPY staging ({columns}) FROM STDIN WITH (FORMAT csv)',
+            CSVStream(rows),
+        )
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) '
+            f'SELECT {columns} FROM staging ON CONFLICT DO NOTHING'
+        )
+        return cursor.rowcount
+
+
+def bulk_create_rows(model, fields, rows):
+    before = model.objects.count()
+    while True:
+        batch = [
+            model(**dict(zip(fields, row)))
+            for row in islice(rows, BATCH_SIZE)
+        ]
+        if not batch:
+            break
+        model.objects.bulk_create(batch, ignore_conflicts=True)
+    return model.objects.count() - before
+
+
+def load_rows(model, fields, rows):
+    if connection.vendor == 'postgresql':
+        return copy_rows(model, fields, rows)
+    return bulk_create_rows(model, fields, rows)
+
+
+class LoadCommand(BaseCommand):
+    model = None
+    fields = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSON file to load')
+
+    def loaded(self):
+        pass
+
+    def handle(self, *args, **options):
+        read = 0
+
+        def counted(rows):
+            nonlocal read
+            for row in rows:
+                read += 1
+                yield row
+
+        started = perf_counter()
+        rows = unique_rows(
+            counted(read_rows(options['path'], self.fields)),
+            unique_keys(self.model, self.fields),
+        )
+        inserted = load_rows(self.model, self.fields, rows)
+        elapsed = perf_counter() - started
+        if inserted:
+            self.loaded()
+        self.stdout.write(self.style.SUCCESS(
+            f'{self.model._meta.verbose_name_plural}: read {read}, '
+            f'inserted {inserted}, skipped {read - inserted} '
+            f'in {elapsed:.2f} s ({read / elapsed:.0f} rows/sec)'
+        ))
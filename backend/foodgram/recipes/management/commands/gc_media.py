@@ -0,0 +1,81 @@
+import os
+from time import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from recipes.models import Recipe
+
+MEDIA_DIRECTORIES = ('images',)
+
+
+def walk_files(path):
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from walk_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+class Command(BaseCommand):
+    help = 'Removes media files that no recipe references'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Keep files modified less than this many seconds ago, '
+                 'so uploads still being processed are not removed'
+        )
+        parser.add_argument('--dry-run', action='store_true')
+
+    def referenced(self):
+        names = set()
+        for image, thumbnail in Recipe.objects.values_list(
+            'image', 'image_thumbnail'
+        ).iterator():
+            names.update((image, thumbnail))
+        names.discard(None)
+        names.discard('')
+        return names
+
+    def still_unused(self, path, name, cutoff):
+        # The scan works from a snapshot, so a file re-uploaded since then
+        # must be caught before it is removed.
+        try:
+            if os.stat(path).st_mtime > cutoff:
+                return False
+        except FileNotFoundError:
+            return False
+        return not Recipe.objects.filter(
+            Q(image=name) | Q(image_thumbnail=name)
+        ).exists()
+
+    def handle(self, *args, **options):
+        referenced = self.referenced()
+        cutoff = time() - options['min_age']
+        removed = kept = freed = 0
+        for directory in MEDIA_DIRECTORIES:
+            path = os.path.join(settings.MEDIA_ROOT, directory)
+            if not os.path.isdir(path):
+                continue
+            for entry in walk_files(path):
+                name = os.path.relpath(
+                    entry.path, settings.MEDIA_ROOT
+                ).replace(os.sep, '/')
+                stat = entry.stat(follow_symlinks=False)
+                if name in referenced or stat.st_mtime > cutoff:
+                    kept += 1
+                    continue
+                if not options['dry_run']:
+                    if not self.still_unused(entry.path, name, cutoff):
+                        kept += 1
+                        continue
+                    os.remove(entry.path)
+                removed += 1
+                freed += stat.st_size
+        action = 'Would remove' if options['dry_run'] else 'Removed'
+        self.stdout.write(
+            f'{action} {removed} files ({freed} bytes), kept {kept}'
+        )
@@ -0,0 +1,12 @@
+from api.cache import invalidate
+from recipes.loaders import LoadCommand
+from recipes.models import Ingredient
+
+
+class Command(LoadCommand):
+    help = 'Loads ingredients from a CSV (name,unit) or JSON file'
+    model = Ingredient
+    fields = ('name', 'measurement_unit')
+
+    def loaded(self):
+        invalidate('ingredients')
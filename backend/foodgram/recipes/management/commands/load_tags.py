@@ -0,0 +1,12 @@
+from api.cache import invalidate
+from recipes.loaders import LoadCommand
+from recipes.models import Tag
+
+
+class Command(LoadCommand):
+    help = 'Loads tags from a CSV (name,color,slug) or JSON file'
+    model = Tag
+    fields = ('name', 'color', 'slug')
+
+    def loaded(self):
+        invalidate('tags')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import rebuild
+from recipes.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Recreates the following feed of every user from Follow rows'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rebuild()
+        self.stdout.write(f'Feed entries: {FeedEntry.objects.count()}')
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import invalidate
+from recipes.counters import recount
+
+
+class Command(BaseCommand):
+    help = 'Repairs denormalized favorite, cart and recipe counters'
+
+    def handle(self, *args, **options):
+        repaired = recount()
+        for field, rows in repaired.items():
+            self.stdout.write(f'{field}: repaired {rows} rows')
+        invalidate('recipe_counters')
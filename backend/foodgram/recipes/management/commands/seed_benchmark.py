@@ -0,0 +1,160 @@
+import random
+from itertools import islice
+from time import perf_counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.cache import invalidate_many
+from recipes.counters import recount
+from recipes.feed import rebuild
+from recipes.search import update_search_index
+from recipes.models import (Favorite, Ingredient,
+                            IngredientRecipe, Recipe, ShoppingCart, Tag)
+from users.models import Follow, User
+
+BATCH_SIZE = 1000
+PASSWORD = 'benchmark-password'
+
+
+def batched(objects, size=BATCH_SIZE):
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Creates synthetic users, recipes and relations for benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--follows-per-user', type=int, default=20)
+        parser.add_argument('--favorites-per-user', type=int, default=30)
+        parser.add_argument('--cart-per-user', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def create(self, model, objects, ignore_conflicts=False):
+        started = perf_counter()
+        created = 0
+        for batch in batched(objects):
+            model.objects.bulk_create(
+                batch, ignore_conflicts=ignore_conflicts
+            )
+            created += len(batch)
+        self.stdout.write(
+            f'{model._meta.verbose_name_plural}: {created} rows '
+            f'in {perf_counter() - started:.2f} s'
+        )
+
+    def new_ids(self, model, last_id):
+        return list(
+            model.objects.filter(pk__gt=last_id).values_list('pk', flat=True)
+        )
+
+    def last_id(self, model):
+        last = model.objects.order_by('-pk').values_list('pk', flat=True)
+        return last.first() or 0
+
+    def ensure_catalog(self):
+        if not Tag.objects.exists():
+            self.create(Tag, (
+                Tag(name=f'Тег {i}', color=f'#{i:06X}', slug=f'tag-{i}')
+                for i in range(10)
+            ))
+        if not Ingredient.objects.exists():
+            self.create(Ingredient, (
+                Ingredient(name=f'Ингредиент {i}', measurement_unit='г')
+                for i in range(2000)
+            ))
+        return (
+            list(Tag.objects.values_list('pk', flat=True)),
+            list(Ingredient.objects.values_list('pk', flat=True)),
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        tag_ids, ingredient_ids = self.ensure_catalog()
+
+        last_user = self.last_id(User)
+        password = make_password(PASSWORD)
+        self.create(User, (
+            User(
+                username=f'bench{last_user + i}',
+                email=f'bench{last_user + i}@example.org',
+                first_name='Bench',
+                last_name=str(last_user + i),
+                password=password,
+            )
+            for i in range(1, options['users'] + 1)
+        ))
+        user_ids = self.new_ids(User, last_user)
+
+        last_recipe = self.last_id(Recipe)
+        self.create(Recipe, (
+            Recipe(
+                name=f'Рецепт {last_recipe + i}',
+                author_id=rng.choice(user_ids),
+                text='Синтетический рецепт для нагрузочного тестирования.',
+                cooking_time=rng.randint(5, 180),
+            )
+            for i in range(1, options['recipes'] + 1)
+        ))
+        recipe_ids = self.new_ids(Recipe, last_recipe)
+
+        per_recipe = min(
+            options['ingredients_per_recipe'], len(ingredient_ids)
+        )
+        self.create(IngredientRecipe, (
+            IngredientRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(ingredient_ids, per_recipe)
+        ))
+        self.create(Recipe.tags.through, (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rng.sample(
+                tag_ids, rng.randint(1, min(3, len(tag_ids)))
+            )
+        ), ignore_conflicts=True)
+
+        self.create(Follow, (
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id in user_ids
+            for author_id in rng.sample(
+                user_ids, min(options['follows_per_user'], len(user_ids))
+            )
+            if author_id != user_id
+        ), ignore_conflicts=True)
+        for model, per_user in (
+            (Favorite, options['favorites_per_user']),
+            (ShoppingCart, options['cart_per_user']),
+        ):
+            self.create(model, (
+                model(user_id=user_id, recipe_id=recipe_id)
+                for user_id in user_ids
+                for recipe_id in rng.sample(
+                    recipe_ids, min(per_user, len(recipe_ids))
+                )
+            ), ignore_conflicts=True)
+
+        recount()
+        rebuild()
+        update_search_index(recipe_ids)
+        invalidate_many(
+            ('ingredient_index', 'recipes', 'authors', 'recipe_counters')
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(user_ids)} users and {len(recipe_ids)} recipes. '
+            f'Password for every user: {PASSWORD}'
+        ))
@@ -0,0 +1,27 @@
+from django.db import migrations
+
+INDEX_NAME = 'recipes_ingredient_lower_name_idx'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+            'ON recipes_ingredient (LOWER(name) text_pattern_ops)'
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_shoppingcart_added'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
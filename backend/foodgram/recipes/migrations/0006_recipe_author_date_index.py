@@ -0,0 +1,17 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_date_id_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-date'], name='recipe_author_date_idx'),
+        ),
+    ]
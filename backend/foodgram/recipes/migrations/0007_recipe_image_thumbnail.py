@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0006_recipe_author_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='image_thumbnail',
+            field=models.ImageField(blank=True, default=None, null=True, upload_to='images/thumbnails/', verbose_name='Миниатюра'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 3.2.3 on 2026-10-18 18:20
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+INDEX_NAME = 'recipes_recipe_search_vector_idx'
+FTS_TABLE = 'recipes_recipe_fts'
+
+INGREDIENT_NAMES = '''
+    SELECT {aggregate}(ingredient.name, ' ')
+    FROM recipes_ingredientrecipe AS amount
+    JOIN recipes_ingredient AS ingredient
+        ON ingredient.id = amount.ingredient_id
+    WHERE amount.recipe_id = recipes_recipe.id
+'''
+
+POSTGRES_UPDATE = f'''
+    UPDATE recipes_recipe SET search_vector =
+        setweight(to_tsvector(%s::regconfig, name), 'A') ||
+        setweight(to_tsvector(%s::regconfig, coalesce((
+            {INGREDIENT_NAMES.format(aggregate='string_agg')}
+        ), '')), 'B') ||
+        setweight(to_tsvector(%s::regconfig, text), 'C')
+'''
+
+SQLITE_INSERT = f'''
+    INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text)
+    SELECT id, name, coalesce((
+        {INGREDIENT_NAMES.format(aggregate='group_concat')}
+    ), ''), text
+    FROM recipes_recipe
+'''
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+            'ON recipes_recipe USING gin (search_vector)'
+        )
+        schema_editor.execute(
+            POSTGRES_UPDATE, [settings.SEARCH_CONFIG] * 3
+        )
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            'USING fts5(name, ingredients, text)'
+        )
+        schema_editor.execute(SQLITE_INSERT)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+    elif schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_feedentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
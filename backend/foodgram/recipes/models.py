@@ -1,6 +1,9 @@
-from django.db import models
-from django.db.models import UniqueConstraint
-from users.models import User
+from django.contrib.postgres.search import SearchVectorField
+from django.db import connection, models
+from django.db.models import (Exists, OuterRef, Prefetch, UniqueConstraint,
+                              Value)
+from django.db.models.expressions import RawSQL
+from users.models import User, annotate_is_subscribed
 from django.core.validators import MinValueValidator, RegexValidator
 
 
@@ -64,6 +67,70 @@ class Ingredient(models.Model):
         return self.name
 
 
+LATEST_BY_AUTHOR = '''
+    SELECT id FROM recipes_recipe WHERE author_id = {author}
+    ORDER BY date DESC, id DESC LIMIT %s
+'''
+
+LATEST_BY_AUTHORS_LATERAL = f'''
+    SELECT latest.id FROM unnest(%s::bigint[]) AS author(id)
+    CROSS JOIN LATERAL (
+        {LATEST_BY_AUTHOR.format(author='author.id')}
+    ) AS latest
+'''
+
+LATEST_BY_AUTHORS_PART = f'''
+    SELECT id FROM ({LATEST_BY_AUTHOR.format(author='%s')})
+'''
+
+
+class RecipeQuerySet(models.QuerySet):
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self.annotate(
+                is_favorited=Value(False),
+                is_in_shopping_cart=Value(False),
+            )
+        return self.annotate(
+            is_favorited=Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+            is_in_shopping_cart=Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')
+            )),
+        )
+
+    def with_read_relations(self, user):
+        authors = annotate_is_subscribed(User.objects.all(), user)
+        return self.prefetch_related(
+            Prefetch('author', queryset=authors),
+            Prefetch('tags', queryset=Tag.objects.all()),
+            Prefetch(
+                'recipe',
+                queryset=IngredientRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        ).defer('search_vector').with_user_flags(user)
+
+    def latest_by_authors(self, author_ids, limit):
+        # One index range scan of at most `limit` rows per author, instead
+        # of reading every recipe of the authors and filtering afterwards.
+        author_ids = list(author_ids)
+        if not author_ids or limit <= 0:
+            return self.none()
+        if connection.vendor == 'postgresql':
+            latest = RawSQL(LATEST_BY_AUTHORS_LATERAL, [author_ids, limit])
+        else:
+            latest = RawSQL(
+                'UNION ALL'.join([LATEST_BY_AUTHORS_PART] * len(author_ids)),
+                [param for author_id in author_ids
+                 for param in (author_id, limit)],
+            )
+        return self.filter(pk__in=latest)
+
+
 class Recipe(models.Model):
 
     name = models.CharField(max_length=40)
@@ -93,6 +160,12 @@ class Recipe(models.Model):
         null=True, default=None, blank=True
     )
 
+    image_thumbnail = models.ImageField(
+        upload_to='images/thumbnails/',
+        null=True, default=None, blank=True,
+        verbose_name='Миниатюра'
+    )
+
     text = models.TextField(
         verbose_name='Описание'
     )
@@ -107,10 +180,35 @@ class Recipe(models.Model):
         auto_now_add=True
     )
 
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+
+    favorites_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В избранном'
+    )
+
+    in_carts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='В списках покупок'
+    )
+
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = RecipeQuerySet.as_manager()
+
     class Meta:
-        ordering = ['-date']
+        ordering = ['-date', '-id']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='recipe_date_id_idx'),
+            models.Index(
+                fields=['author', '-date'], name='recipe_author_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -196,6 +294,10 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart',
         verbose_name='Рецепт'
     )
+    added = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата добавления'
+    )
 
     class Meta:
         verbose_name = 'Список покупок'
@@ -207,3 +309,40 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user} - {self.recipe}'
+
+
+class FeedEntry(models.Model):
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт',
+    )
+    date = models.DateTimeField(
+        verbose_name='Дата публикации'
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-date', '-id'], name='feed_user_date_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user} - {self.recipe}'
@@ -0,0 +1,84 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+
+FTS_TABLE = 'recipes_recipe_fts'
+BATCH_SIZE = 1000
+WORDS = re.compile(r'\w+')
+
+INGREDIENT_NAMES = '''
+    SELECT {aggregate}(ingredient.name, ' ')
+    FROM recipes_ingredientrecipe AS amount
+    JOIN recipes_ingredient AS ingredient
+        ON ingredient.id = amount.ingredient_id
+    WHERE amount.recipe_id = recipes_recipe.id
+'''
+
+POSTGRES_UPDATE = f'''
+    UPDATE recipes_recipe SET search_vector =
+        setweight(to_tsvector(%s::regconfig, name), 'A') ||
+        setweight(to_tsvector(%s::regconfig, coalesce((
+            {INGREDIENT_NAMES.format(aggregate='string_agg')}
+        ), '')), 'B') ||
+        setweight(to_tsvector(%s::regconfig, text), 'C')
+'''
+
+SQLITE_DELETE = f'DELETE FROM {FTS_TABLE}'
+
+SQLITE_INSERT = f'''
+    INSERT INTO {FTS_TABLE} (rowid, name, ingredients, text)
+    SELECT id, name, coalesce((
+        {INGREDIENT_NAMES.format(aggregate='group_concat')}
+    ), ''), text
+    FROM recipes_recipe
+'''
+
+
+def execute_update(recipe_ids):
+    recipe_where = rowid_where = ''
+    if recipe_ids is not None:
+        placeholders = ', '.join(['%s'] * len(recipe_ids))
+        recipe_where = f' WHERE id IN ({placeholders})'
+        rowid_where = f' WHERE rowid IN ({placeholders})'
+    params = list(recipe_ids or [])
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            config = [settings.SEARCH_CONFIG] * 3
+            cursor.execute(POSTGRES_UPDATE + recipe_where, config + params)
+        elif connection.vendor == 'sqlite':
+            cursor.execute(SQLITE_DELETE + rowid_where, params)
+            cursor.execute(SQLITE_INSERT + recipe_where, params)
+
+
+def update_search_index(recipe_ids=None):
+    if recipe_ids is None:
+        return execute_update(None)
+    recipe_ids = list(recipe_ids)
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        execute_update(recipe_ids[start:start + BATCH_SIZE])
+
+
+def search_recipes(queryset, query):
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            search_rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-search_rank', '-date', '-id')
+    words = WORDS.findall(query)
+    if not words:
+        return queryset.none()
+    # Every word has to match, as a prefix, in any column; bm25 weighs
+    # name, ingredients and text like the postgres setweight labels.
+    match = ' '.join(f'"{word}"*' for word in words)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE}.rowid = recipes_recipe.id',
+               f'{FTS_TABLE} MATCH %s'],
+        params=[match],
+        select={'search_rank': f'bm25({FTS_TABLE}, 10.0, 5.0, 1.0)'},
+    ).order_by('search_rank', '-date', '-id')
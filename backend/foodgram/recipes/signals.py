@@ -0,0 +1,82 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from foodgram.transactions import on_commit_batch
+from users.models import Follow, Profile
+
+from . import feed
+from .counters import change_count
+from .models import Favorite, Recipe, ShoppingCart
+from .search import update_search_index
+
+RECIPE_COUNTERS = {
+    Favorite: 'favorites_count',
+    ShoppingCart: 'in_carts_count',
+}
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+def recipe_counter_added(sender, instance, created, **kwargs):
+    if created and instance.recipe_id:
+        change_count(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            RECIPE_COUNTERS[sender], 1
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+def recipe_counter_removed(sender, instance, **kwargs):
+    if instance.recipe_id:
+        change_count(
+            Recipe.objects.filter(pk=instance.recipe_id),
+            RECIPE_COUNTERS[sender], -1
+        )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created and not change_count(
+        Profile.objects.filter(user_id=instance.author_id),
+        'recipes_count', 1
+    ):
+        Profile.objects.get_or_create(
+            user_id=instance.author_id,
+            defaults={'recipes_count': Recipe.objects.filter(
+                author_id=instance.author_id
+            ).count()},
+        )
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_count(
+        Profile.objects.filter(user_id=instance.author_id),
+        'recipes_count', -1
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_published(sender, instance, created, **kwargs):
+    if created:
+        feed.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        feed.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    feed.remove(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_search_changed(sender, instance, **kwargs):
+    # Ingredient rows are only written in the transaction that saves their
+    # recipe, so reindexing the recipe on commit covers them too.
+    on_commit_batch(update_search_index, instance.id)
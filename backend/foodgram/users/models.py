@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Exists, OuterRef, Value
 from django.contrib.auth import get_user_model
 
 
@@ -29,3 +30,41 @@ class Follow(models.Model):
         auto_now_add=True,
         verbose_name='Дата подписки'
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            )
+        ]
+
+
+class Profile(models.Model):
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='profile',
+        verbose_name='Пользователь'
+    )
+
+    recipes_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество рецептов'
+    )
+
+    class Meta:
+        verbose_name = 'Профиль'
+        verbose_name_plural = 'Профили'
+
+    def __str__(self):
+        return f'{self.user} - {self.recipes_count}'
+
+
+def annotate_is_subscribed(queryset, user):
+    if user.is_anonymous:
+        return queryset.annotate(is_subscribed=Value(False))
+    return queryset.annotate(is_subscribed=Exists(
+        Follow.objects.filter(user=user, author=OuterRef('pk'))
+    ))